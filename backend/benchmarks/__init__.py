@@ -0,0 +1,5 @@
+"""
+Benchmark and load-test suite for the equipment API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.micro``.
+"""
@@ -0,0 +1,149 @@
+"""
+Shared helpers: Django setup, latency stats, peak RSS and baseline comparison.
+"""
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# Allowed slowdown before a metric counts as a regression (0.25 == 25%).
+DEFAULT_TOLERANCE = 0.25
+# Latency differences below this are treated as timer noise.
+NOISE_FLOOR_MS = 5.0
+# Counters that must never go up, whatever the tolerance (the baseline is usually 0).
+NO_INCREASE_METRICS = ('errors',)
+# Results entry holding the run's parameters; other runs are only compared with a
+# baseline recorded with the same parameters.
+WORKLOAD_KEY = 'workload'
+
+
+def setup_django(db_path=None):
+    """Configure Django for standalone scripts; optionally point SQLite at db_path."""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'equipment_visualizer.settings')
+    from django.conf import settings
+    if db_path is not None:
+        settings.DATABASES['default']['NAME'] = str(db_path)
+    import django
+    django.setup()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers (pct in 0..100)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def latency_stats(samples_ms):
+    """p50/p99/mean in milliseconds for a list of samples."""
+    return {
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'mean_ms': round(sum(samples_ms) / len(samples_ms), 3),
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def save_baseline(section, results):
+    """Replace one section (e.g. 'micro' or 'load') of the stored baseline."""
+    baseline = load_baseline()
+    baseline[section] = results
+    with open(BASELINE_PATH, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def _higher_is_better(metric):
+    return metric.startswith('throughput')
+
+
+def workload_mismatch(section, results):
+    """
+    Message explaining why results can't be compared with the stored baseline
+    (recorded with other parameters), or None if they can.
+    """
+    stored = load_baseline().get(section, {})
+    if not stored or results.get(WORKLOAD_KEY) == stored.get(WORKLOAD_KEY):
+        return None
+    return f"workload {results.get(WORKLOAD_KEY)} differs from the baseline's {stored.get(WORKLOAD_KEY)}"
+
+
+def compare(section, results, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results against the stored baseline section.
+    Returns a list of human-readable regression messages (empty if none).
+    """
+    stored = load_baseline().get(section, {})
+    regressions = []
+    for name, metrics in results.items():
+        base_metrics = stored.get(name)
+        if not base_metrics or name == WORKLOAD_KEY:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+                continue
+            if metric in NO_INCREASE_METRICS:
+                regressed = value > base
+            elif _higher_is_better(metric):
+                regressed = value < base * (1 - tolerance)
+            else:
+                regressed = value > base * (1 + tolerance)
+                if metric.endswith('_ms') and value - base < NOISE_FLOOR_MS:
+                    regressed = False
+            if regressed:
+                regressions.append(f"{name}.{metric}: {value} (baseline {base})")
+    return regressions
+
+
+def report(section, results, args):
+    """Print results, then compare or update the baseline. Returns a process exit code."""
+    print(json.dumps(results, indent=2, sort_keys=True))
+    if args.update_baseline:
+        save_baseline(section, results)
+        print(f"Baseline '{section}' updated: {BASELINE_PATH}")
+        return 0
+    mismatch = workload_mismatch(section, results)
+    if mismatch:
+        print(f"\nNot compared: {mismatch}. Rerun with the baseline's parameters, or record a new baseline with --update-baseline.")
+        return 1
+    regressions = compare(section, results, args.tolerance)
+    if regressions:
+        print(f"\nRegressions vs baseline (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions vs baseline (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+def add_baseline_args(parser):
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed regression ratio (default 0.25)')
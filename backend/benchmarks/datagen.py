@@ -0,0 +1,99 @@
+"""
+Synthetic CSV generator that scales the shape of sample_equipment_data.csv
+to N rows and M equipment types.
+
+    python -m benchmarks.datagen --rows 100000 --types 12 -o /tmp/equipment_100k.csv
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+from pathlib import Path
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent.parent / 'sample_equipment_data.csv'
+HEADER = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC = ['Flowrate', 'Pressure', 'Temperature']
+
+# Used when the sample file is not available.
+FALLBACK_PROFILES = {
+    'Pump': (120.0, 5.2, 110.0),
+    'Compressor': (95.0, 8.4, 95.0),
+    'Valve': (60.0, 4.1, 105.0),
+    'HeatExchanger': (150.0, 6.2, 130.0),
+    'Reactor': (140.0, 7.5, 140.0),
+    'Condenser': (170.0, 6.4, 125.0),
+}
+
+
+def load_type_profiles(sample_path=SAMPLE_CSV):
+    """Per-type mean (Flowrate, Pressure, Temperature) from the sample CSV."""
+    try:
+        with open(sample_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    except OSError:
+        return dict(FALLBACK_PROFILES)
+    grouped = {}
+    for row in rows:
+        values = tuple(float(row[c]) for c in NUMERIC)
+        grouped.setdefault(row['Type'].strip(), []).append(values)
+    return {
+        t: tuple(sum(v[i] for v in vals) / len(vals) for i in range(len(NUMERIC)))
+        for t, vals in grouped.items()
+    } or dict(FALLBACK_PROFILES)
+
+
+def type_profiles(n_types, sample_path=SAMPLE_CSV):
+    """Return n_types (name, means) pairs, cycling sample types with a suffix when M exceeds them."""
+    base = list(load_type_profiles(sample_path).items())
+    profiles = []
+    for i in range(n_types):
+        name, means = base[i % len(base)]
+        if i >= len(base):
+            name = f"{name}{i // len(base) + 1}"
+        profiles.append((name, means))
+    return profiles
+
+
+def iter_rows(n_rows, n_types, seed=0, sample_path=SAMPLE_CSV):
+    """Yield n_rows CSV rows (lists) with values jittered ±20% around each type's means."""
+    rng = random.Random(seed)
+    profiles = type_profiles(n_types, sample_path)
+    counters = {}
+    for _ in range(n_rows):
+        name, means = profiles[rng.randrange(len(profiles))]
+        counters[name] = counters.get(name, 0) + 1
+        values = [round(m * rng.uniform(0.8, 1.2), 1) for m in means]
+        yield [f"{name}-{counters[name]}", name] + values
+
+
+def write_csv(out, n_rows, n_types, seed=0):
+    """Write a synthetic CSV to a text file object."""
+    writer = csv.writer(out)
+    writer.writerow(HEADER)
+    writer.writerows(iter_rows(n_rows, n_types, seed))
+
+
+def generate_bytes(n_rows, n_types, seed=0):
+    """Return a synthetic CSV as bytes (convenient for in-memory uploads)."""
+    buf = io.StringIO()
+    write_csv(buf, n_rows, n_types, seed)
+    return buf.getvalue().encode()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--types', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='Output path (default: stdout)')
+    args = parser.parse_args(argv)
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write_csv(f, args.rows, args.types, args.seed)
+    else:
+        write_csv(sys.stdout, args.rows, args.types, args.seed)
+
+
+if __name__ == '__main__':
+    main()
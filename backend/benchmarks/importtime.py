@@ -0,0 +1,191 @@
+"""
+Import-time budget: what a worker imports at startup and for its first request
+to each endpoint, measured with `python -X importtime` in fresh interpreters.
+
+    python -m benchmarks.importtime                      # compare against baseline.json
+    python -m benchmarks.importtime --update-baseline    # record a new baseline
+
+Fails if the URLconf, history or summary import pandas, NumPy, ReportLab,
+pyarrow or openpyxl, or if startup imports exceed --budget-ms.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .common import BACKEND_DIR, add_baseline_args, report, setup_django
+
+HEAVY_MODULES = ('pandas', 'numpy', 'reportlab', 'pyarrow', 'openpyxl')
+# Scenarios that must never load a heavy module.
+LAZY_SCENARIOS = ('startup', 'history', 'summary')
+# Startup import budget (Django, DRF, URLconf and views) in milliseconds.
+DEFAULT_BUDGET_MS = 1000.0
+
+STARTUP_MARK = '@@importtime:startup'
+REQUEST_MARK = '@@importtime:request'
+END_MARK = '@@importtime:end'
+
+SAMPLE_CSV = b"Equipment Name,Type,Flowrate,Pressure,Temperature\nP-1,Pump,10.5,2.1,80\nV-1,Valve,5.0,1.2,60\n"
+
+# scenario -> (method, path, body); None means startup only
+SCENARIOS = {
+    'startup': None,
+    'startup_preload': None,
+    'history': ('get', '/api/history/', None),
+    'summary': ('get', '/api/summary/{id}/', None),
+    'upload': ('post', '/api/upload/', 'csv'),
+    'query': ('post', '/api/query/{id}/', 'json'),
+    'pdf': ('get', '/api/report/{id}/pdf/', None),
+}
+
+
+def _mark(label):
+    print(label, file=sys.stderr, flush=True)
+
+
+def _loaded_heavy():
+    return sorted(m for m in HEAVY_MODULES if m in sys.modules)
+
+
+def _child(scenario, db_path):
+    """Runs inside `python -X importtime`; prints loaded heavy modules as JSON."""
+    _mark(STARTUP_MARK)
+    setup_django(db_path)
+    from django.urls import get_resolver
+    get_resolver().url_patterns  # imports the URLconf and every view module
+    startup_heavy = _loaded_heavy()
+
+    request = SCENARIOS[scenario]
+    if request is not None:
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+        from equipment_api.models import EquipmentDataset
+
+        setup_test_environment()
+        call_command('migrate', verbosity=0)
+        dataset = EquipmentDataset.objects.create(
+            name='importtime',
+            total_count=2,
+            avg_flowrate=7.75,
+            avg_pressure=1.65,
+            avg_temperature=70.0,
+            type_distribution={'Pump': 1, 'Valve': 1},
+            raw_rows=[
+                {'Equipment Name': 'P-1', 'Type': 'Pump', 'Flowrate': 10.5, 'Pressure': 2.1, 'Temperature': 80.0},
+                {'Equipment Name': 'V-1', 'Type': 'Valve', 'Flowrate': 5.0, 'Pressure': 1.2, 'Temperature': 60.0},
+            ],
+        )
+        method, path, body = request
+        client = Client()
+        kwargs = {}
+        if body == 'csv':
+            kwargs['data'] = {'file': SimpleUploadedFile('importtime.csv', SAMPLE_CSV, content_type='text/csv')}
+        elif body == 'json':
+            kwargs.update(data=json.dumps({'group_by': 'Type', 'aggregates': [{'func': 'count'}]}),
+                          content_type='application/json')
+        _mark(REQUEST_MARK)
+        response = getattr(client, method)(path.format(id=dataset.pk), **kwargs)
+        if response.status_code >= 400:
+            raise SystemExit(f"{method.upper()} {path} returned {response.status_code}")
+        response.getvalue()  # drain streamed responses (PDF, exports)
+    else:
+        _mark(REQUEST_MARK)
+    _mark(END_MARK)
+    print(json.dumps({'startup_heavy': startup_heavy, 'heavy': _loaded_heavy()}))
+
+
+def _import_ms(lines):
+    """Sum of the cumulative times of top-level imports in -X importtime output lines."""
+    total_us = 0
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # the column header
+        name = parts[2]
+        if len(name) - len(name.lstrip()) == 1:  # top level: no extra indentation
+            total_us += int(parts[1])
+    return total_us / 1000
+
+
+def _segment(lines, start, end):
+    return lines[lines.index(start) + 1:lines.index(end)]
+
+
+def measure(scenario):
+    """Run one scenario in a fresh interpreter. Returns (startup_ms, request_ms, result)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, API_PRELOAD_HEAVY=str(scenario == 'startup_preload'), API_ASYNC_VIEWS='False')
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'benchmarks.importtime',
+             '--child', scenario, '--db', str(Path(tmp) / 'importtime.sqlite3')],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"scenario {scenario!r} failed:\n{proc.stderr[-2000:]}")
+    lines = proc.stderr.splitlines()
+    startup = _import_ms(_segment(lines, STARTUP_MARK, REQUEST_MARK))
+    request = _import_ms(_segment(lines, REQUEST_MARK, END_MARK))
+    return startup, request, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(repeat):
+    results = {}
+    for scenario, request in SCENARIOS.items():
+        # Import times are noisy; keep the best of `repeat` fresh interpreters.
+        samples = [measure(scenario) for _ in range(repeat)]
+        heavy = samples[-1][2]['startup_heavy' if request is None else 'heavy']
+        metrics = {'heavy_modules': heavy}
+        if request is None:
+            metrics['import_ms'] = round(min(s[0] for s in samples), 1)
+        else:
+            metrics['first_request_import_ms'] = round(min(s[1] for s in samples), 1)
+        results[scenario] = metrics
+    return results
+
+
+def budget_failures(results, budget_ms):
+    failures = []
+    for scenario in LAZY_SCENARIOS:
+        heavy = results[scenario]['heavy_modules']
+        if heavy:
+            failures.append(f"{scenario} imported {', '.join(heavy)}")
+    startup_ms = results['startup']['import_ms']
+    if startup_ms > budget_ms:
+        failures.append(f"startup imports took {startup_ms} ms (budget {budget_ms} ms)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters per scenario (best is kept)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='Startup import budget')
+    parser.add_argument('--child', choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.db)
+        return 0
+
+    results = run(args.repeat)
+    code = report('importtime', results, args)
+    failures = budget_failures(results, args.budget_ms)
+    if failures:
+        print("\nImport budget exceeded:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\nImport budget met: no heavy modules on startup, history or summary.")
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
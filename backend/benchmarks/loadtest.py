@@ -0,0 +1,210 @@
+"""
+Local load test: concurrent uploads, history polls and PDF downloads.
+
+By default a threaded Django WSGI server is started in-process on a throwaway
+SQLite database. Pass --url to target an already running server instead
+(peak RSS is then not reported, since the server is another process).
+
+    python -m benchmarks.loadtest --requests 300 --concurrency 8
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000/api --idle 1000
+
+--idle N holds N slow-client connections open (request headers sent but never
+finished) for the whole run, to compare how WSGI and ASGI servers cope with them.
+"""
+import argparse
+import json
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from .common import WORKLOAD_KEY, add_baseline_args, latency_stats, peak_rss_mb, report, setup_django
+from .datagen import generate_bytes
+
+# Relative weight of each operation in the mixed workload.
+DEFAULT_MIX = {'upload': 1, 'history': 6, 'pdf': 2}
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: text/csv\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+# Status recorded when the server never answered (connection error or timeout).
+NO_RESPONSE = 599
+
+
+def _request(url, data=None, content_type=None, timeout=30):
+    req = Request(url, data=data, method='POST' if data is not None else 'GET')
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    except HTTPError as e:
+        return e.code, e.read()
+    except OSError as e:  # URLError, timeouts, resets
+        return NO_RESPONSE, str(e).encode()
+
+
+def open_idle_connections(base_url, n):
+    """Open n connections that send a partial request and then go quiet. Returns the sockets."""
+    parts = urlsplit(base_url)
+    partial = f"GET {parts.path}/history/ HTTP/1.1\r\nHost: {parts.hostname}\r\n".encode()
+    sockets = []
+    for _ in range(n):
+        try:
+            sock = socket.create_connection((parts.hostname, parts.port or 80), timeout=5)
+            sock.sendall(partial)
+        except OSError:
+            break
+        sockets.append(sock)
+    return sockets
+
+
+class LoadTest:
+    def __init__(self, base_url, csv_bytes, mix=None, seed=0, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.csv_bytes = csv_bytes
+        self.mix = mix or DEFAULT_MIX
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latest_id = None
+        self.samples = {op: [] for op in self.mix}
+        self.errors = {op: 0 for op in self.mix}
+
+    def upload(self):
+        body, ctype = _multipart({'name': 'loadtest'}, {'file': ('loadtest.csv', self.csv_bytes)})
+        status, content = _request(f"{self.base_url}/upload/", body, ctype, self.timeout)
+        if status == 201:
+            with self.lock:
+                self.latest_id = json.loads(content)['id']
+        return status
+
+    def history(self):
+        return _request(f"{self.base_url}/history/", timeout=self.timeout)[0]
+
+    def pdf(self):
+        with self.lock:
+            dataset_id = self.latest_id
+        return _request(f"{self.base_url}/report/{dataset_id}/pdf/", timeout=self.timeout)[0]
+
+    def _one(self, op):
+        start = time.perf_counter()
+        status = getattr(self, op)()
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.samples[op].append(elapsed)
+            if status >= 400:
+                self.errors[op] += 1
+
+    def run(self, n_requests, concurrency):
+        self.upload()  # make sure a dataset exists for PDF downloads
+        ops = self.rng.choices(list(self.mix), weights=list(self.mix.values()), k=n_requests)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(self._one, ops))
+        wall = time.perf_counter() - start
+
+        results = {}
+        for op, samples in self.samples.items():
+            if samples:
+                results[op] = dict(latency_stats(samples), errors=self.errors[op], count=len(samples))
+        all_samples = [s for samples in self.samples.values() for s in samples]
+        results['overall'] = dict(
+            latency_stats(all_samples),
+            throughput_rps=round(len(all_samples) / wall, 2),
+            errors=sum(self.errors.values()),
+        )
+        return results
+
+
+def start_local_server(db_path):
+    """Migrate a fresh SQLite DB and serve the project on an ephemeral port. Returns (server, base_url)."""
+    setup_django(db_path)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    # Give concurrent SQLite writers room to wait instead of failing with "database is locked".
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+    call_command('migrate', verbosity=0, interactive=False)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='API base URL of a running server (default: start one in-process)')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=2000, help='Rows per uploaded CSV')
+    parser.add_argument('--types', type=int, default=6)
+    parser.add_argument('--idle', type=int, default=0, help='Slow-client connections held open during the run')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request client timeout in seconds')
+    add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    csv_bytes = generate_bytes(args.rows, args.types)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        base_url = args.url
+        if not base_url:
+            server, base_url = start_local_server(Path(tmp) / 'loadtest.sqlite3')
+        idle = open_idle_connections(base_url, args.idle) if args.idle else []
+        try:
+            results = LoadTest(base_url, csv_bytes, timeout=args.timeout).run(args.requests, args.concurrency)
+            if args.idle:
+                results['overall']['idle_connections'] = len(idle)
+        finally:
+            for sock in idle:
+                sock.close()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                from django.db import connections
+                connections.close_all()
+    if server is not None:
+        results['process'] = {'peak_rss_mb': peak_rss_mb()}
+    results[WORKLOAD_KEY] = {
+        'server': args.url or 'in-process',
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'rows': args.rows,
+        'types': args.types,
+        'idle': args.idle,
+        'timeout': args.timeout,
+    }
+    return report('load', results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Micro-benchmarks for parse_and_analyze, build_pdf_report and serializer encoding.
+
+    python -m benchmarks.micro                       # compare against baseline.json
+    python -m benchmarks.micro --update-baseline     # record a new baseline
+"""
+import argparse
+import io
+import sys
+import time
+
+from .common import add_baseline_args, latency_stats, peak_rss_mb, report, setup_django
+from .datagen import generate_bytes
+
+
+def _time(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return latency_stats(samples)
+
+
+def _make_dataset(summary):
+    from django.utils import timezone
+    from equipment_api.models import EquipmentDataset
+
+    return EquipmentDataset(
+        id=1,
+        name='benchmark',
+        created_at=timezone.now(),
+        total_count=summary['total_count'],
+        avg_flowrate=summary.get('avg_flowrate'),
+        avg_pressure=summary.get('avg_pressure'),
+        avg_temperature=summary.get('avg_temperature'),
+        type_distribution=summary.get('type_distribution', {}),
+        raw_rows=summary.get('raw_rows', []),
+    )
+
+
+def run(sizes, n_types, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from equipment_api.pdf_report import build_pdf_report
+    from equipment_api.serializers import EquipmentDatasetSerializer
+    from equipment_api.services import parse_and_analyze
+
+    results = {}
+    for n_rows in sizes:
+        tag = f"[{n_rows}x{n_types}]"
+        payload = generate_bytes(n_rows, n_types)
+        summary = parse_and_analyze(io.BytesIO(payload))
+        dataset = _make_dataset(summary)
+
+        results[f"parse_and_analyze{tag}"] = _time(lambda: parse_and_analyze(io.BytesIO(payload)), repeat)
+        results[f"build_pdf_report{tag}"] = _time(lambda: build_pdf_report(dataset), repeat)
+        results[f"serializer_encode{tag}"] = _time(
+            lambda: JSONRenderer().render(EquipmentDatasetSerializer(dataset).data), repeat
+        )
+    results['process'] = {'peak_rss_mb': peak_rss_mb()}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='1000,10000,100000', help='Comma-separated dataset sizes')
+    parser.add_argument('--types', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    sizes = [int(s) for s in args.rows.split(',') if s.strip()]
+    results = run(sizes, args.types, args.repeat)
+    return report('micro', results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from unittest import TestCase, mock
+
+from . import common
+
+BASELINE = {
+    'load': {
+        'overall': {'errors': 0, 'p50_ms': 200.0, 'throughput_rps': 40.0},
+        'pdf': {'count': 70, 'errors': 0, 'p50_ms': 160.0},
+        'workload': {'server': 'in-process', 'requests': 300, 'concurrency': 8},
+    },
+}
+
+
+class CompareTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(common, 'load_baseline', return_value=BASELINE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def compare(self, **overall):
+        return common.compare('load', {'overall': dict(BASELINE['load']['overall'], **overall)})
+
+    def test_unchanged(self):
+        self.assertEqual(self.compare(), [])
+
+    def test_within_tolerance_and_noise(self):
+        self.assertEqual(self.compare(p50_ms=240.0, throughput_rps=31.0), [])
+        self.assertEqual(common.compare('load', {'pdf': {'count': 70, 'errors': 0, 'p50_ms': 164.9}}, 0), [])
+
+    def test_slower(self):
+        self.assertEqual(self.compare(p50_ms=260.0), ['overall.p50_ms: 260.0 (baseline 200.0)'])
+        self.assertEqual(self.compare(throughput_rps=20.0), ['overall.throughput_rps: 20.0 (baseline 40.0)'])
+
+    def test_errors_must_not_increase(self):
+        # Failing fast looks faster; the error count still has to flag it.
+        regressions = self.compare(errors=300, p50_ms=3.0, throughput_rps=900.0)
+        self.assertEqual(regressions, ['overall.errors: 300 (baseline 0)'])
+        self.assertEqual(self.compare(errors=1), ['overall.errors: 1 (baseline 0)'])
+
+    def test_zero_baseline_counter(self):
+        baseline = {'load': {'overall': {'retries': 0}}}
+        with mock.patch.object(common, 'load_baseline', return_value=baseline):
+            self.assertEqual(common.compare('load', {'overall': {'retries': 2}}), ['overall.retries: 2 (baseline 0)'])
+
+    def test_workload_mismatch(self):
+        workload = dict(BASELINE['load']['workload'])
+        self.assertIsNone(common.workload_mismatch('load', {'workload': workload}))
+        for change in ({'concurrency': 4}, {'server': 'http://127.0.0.1:8000/api'}):
+            with self.subTest(change=change):
+                self.assertIn('differs', common.workload_mismatch('load', {'workload': dict(workload, **change)}))
+        self.assertIsNotNone(common.workload_mismatch('load', {}))
+        self.assertIsNone(common.workload_mismatch('micro', {}))
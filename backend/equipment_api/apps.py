@@ -1,7 +1,23 @@
+import importlib
+
 from django.apps import AppConfig
+from django.conf import settings
+
+# Imported on first use by services, query and pdf_report, so history/summary never load them.
+HEAVY_MODULES = ('pandas', 'reportlab.platypus')
+
+
+def import_heavy_modules():
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
 
 
 class EquipmentApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'equipment_api'
     verbose_name = 'Chemical Equipment API'
+
+    def ready(self):
+        from . import metrics  # noqa: F401 -- connects the per-request DB query counter
+        if settings.API_PRELOAD_HEAVY:
+            import_heavy_modules()
@@ -0,0 +1,256 @@
+"""
+Async versions of the API views for the ASGI deployment (settings.API_ASYNC_VIEWS).
+Same URLs, payloads and status codes as views.py; pandas and ReportLab work runs
+in the bounded pools from executor.py so the event loop stays free for slow clients.
+"""
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import events, export
+from .executor import run_blocking, run_cpu_bound
+from .metrics import TimedJSONRenderer, span
+from .models import EquipmentDataset
+from .pdf_report import build_pdf_report
+from .query import run_query
+from .serializers import EquipmentDatasetSerializer
+from .services import parse_and_analyze
+from .views import MAX_STORED_DATASETS, trim_to_last_n
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def _aiter_blocking(iterator):
+    """Pull each chunk of a blocking generator in the worker pool (keeps the loop free)."""
+    done = object()
+    while True:
+        chunk = await run_blocking(next, iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def _initial(view, drf_request):
+    """
+    APIView.initial() without the content negotiation: authenticate, then check
+    permissions and throttles. Raises APIException like APIView would.
+    """
+    drf_request.user  # authenticate now, as APIView.perform_authentication does
+    for permission in (permission() for permission in view.permission_classes):
+        if not permission.has_permission(drf_request, view):
+            if drf_request.authenticators and not drf_request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(
+                detail=getattr(permission, 'message', None), code=getattr(permission, 'code', None)
+            )
+    waits = [throttle.wait() for throttle in (throttle() for throttle in view.throttle_classes)
+             if not throttle.allow_request(drf_request, view)]
+    if waits:
+        raise exceptions.Throttled(max((w for w in waits if w is not None), default=None))
+
+
+def _exception_response(exc, drf_request):
+    """APIView.handle_exception() + DRF's exception_handler, as a JsonResponse."""
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # WWW-Authenticate from the first authenticator means 401, else DRF coerces to 403
+        authenticators = drf_request.authenticators
+        auth_header = authenticators[0].authenticate_header(drf_request) if authenticators else None
+        if auth_header:
+            headers['WWW-Authenticate'] = auth_header
+        else:
+            exc.status_code = 403
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return JsonResponse(data, status=exc.status_code, headers=headers, safe=False)
+
+
+def _render(data, many=False):
+    return TimedJSONRenderer().render(EquipmentDatasetSerializer(data, many=many).data)
+
+
+def _json(body, status=200):
+    return HttpResponse(body, content_type='application/json', status=status)
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+async def _iter_chunks(data):
+    for i in range(0, len(data), STREAM_CHUNK_SIZE):
+        yield data[i:i + STREAM_CHUNK_SIZE]
+
+
+class AsyncAPIView(View):
+    """
+    Authenticates, checks permissions and throttles like a DRF APIView (incl. CSRF for
+    session auth and the 401/403 choice) before dispatching.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # As with APIView, CSRF is only enforced by SessionAuthentication.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        try:
+            await sync_to_async(_initial)(self, drf_request)
+        except exceptions.APIException as e:
+            return _exception_response(e, drf_request)
+        request.api_user = drf_request.user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+def _read_upload(request):
+    file_obj = request.FILES.get('file')
+    name = request.POST.get('name') or (file_obj.name if file_obj else None) or 'Untitled'
+    job_id = request.POST.get('job_id') or uuid.uuid4().hex
+    return file_obj, name, job_id
+
+
+class CSVUploadView(AsyncAPIView):
+
+    async def post(self, request):
+        with span('multipart'):
+            file_obj, name, job_id = await run_blocking(_read_upload, request)
+        if not file_obj:
+            return _error('No file provided', 400)
+
+        await sync_to_async(events.job_progress)(job_id, 'parsing')
+        try:
+            summary = await run_blocking(parse_and_analyze, file_obj)
+        except ValueError as e:
+            await sync_to_async(events.job_progress)(job_id, 'failed', error=str(e))
+            return _error(str(e), 400)
+        await sync_to_async(events.job_progress)(job_id, 'saving')
+
+        user = request.api_user
+        dataset = EquipmentDataset(
+            name=name,
+            uploaded_by=user if user.is_authenticated else None,
+            total_count=summary['total_count'],
+            avg_flowrate=summary.get('avg_flowrate'),
+            avg_pressure=summary.get('avg_pressure'),
+            avg_temperature=summary.get('avg_temperature'),
+            type_distribution=summary.get('type_distribution', {}),
+            raw_rows=summary.get('raw_rows', []),
+        )
+        with span('db_write'):
+            await dataset.asave()
+        await sync_to_async(events.dataset_created)(dataset, job_id)
+        with span('trim'):
+            await sync_to_async(trim_to_last_n)(user)
+
+        with span('serialize'):
+            body = await run_blocking(_render, dataset)
+        return _json(body, status=201)
+
+
+class SummaryView(AsyncAPIView):
+    """Get summary for a dataset by id."""
+
+    async def get(self, request, dataset_id):
+        try:
+            with span('db_read'):
+                dataset = await EquipmentDataset.objects.aget(pk=dataset_id)
+        except EquipmentDataset.DoesNotExist:
+            return _error('Dataset not found', 404)
+        with span('serialize'):
+            body = await run_blocking(_render, dataset)
+        return _json(body)
+
+
+class HistoryListView(AsyncAPIView):
+    """List last 5 uploaded datasets."""
+
+    async def get(self, request):
+        with span('db_read'):
+            qs = EquipmentDataset.objects.all().order_by('-created_at')[:MAX_STORED_DATASETS]
+            datasets = [d async for d in qs]
+        with span('serialize'):
+            body = await run_blocking(_render, datasets, True)
+        return _json(body)
+
+
+class PDFReportView(AsyncAPIView):
+    """Download PDF report for a dataset, streamed in chunks."""
+
+    async def get(self, request, dataset_id):
+        try:
+            with span('db_read'):
+                dataset = await EquipmentDataset.objects.aget(pk=dataset_id)
+        except EquipmentDataset.DoesNotExist:
+            return _error('Dataset not found', 404)
+        with span('pdf_build'):
+            pdf_bytes = await run_cpu_bound(build_pdf_report, dataset)
+        response = StreamingHttpResponse(_iter_chunks(pdf_bytes), content_type='application/pdf')
+        response['Content-Length'] = str(len(pdf_bytes))
+        response['Content-Disposition'] = f'attachment; filename="equipment_report_{dataset_id}.pdf"'
+        return response
+
+
+class DatasetQueryView(AsyncAPIView):
+    """Run a filter / group-by / aggregate query over a dataset (see query.py)."""
+
+    async def post(self, request, dataset_id):
+        try:
+            spec = json.loads(request.body or b'{}')
+        except ValueError:
+            return _error('Invalid JSON body', 400)
+        try:
+            with span('query'):
+                result = await run_blocking(run_query, dataset_id, spec)
+        except EquipmentDataset.DoesNotExist:
+            return _error('Dataset not found', 404)
+        except ValueError as e:
+            return _error(str(e), 400)
+        return _json(TimedJSONRenderer().render(result))
+
+
+class DatasetExportView(AsyncAPIView):
+    """Stream a dataset's rows (or, with part='stats', its statistics) in an export format."""
+    part = 'rows'
+
+    async def get(self, request, dataset_id, fmt):
+        compress = request.GET.get('compress') or None
+        load = export.stats_rows if self.part == 'stats' else export.dataset_rows
+        try:
+            export.check(fmt, compress)
+            with span('db_read'):
+                columns, rows = await run_blocking(load, dataset_id)
+        except EquipmentDataset.DoesNotExist:
+            return _error('Dataset not found', 404)
+        except ValueError as e:
+            return _error(str(e), 400)
+        except export.ExportUnavailable as e:
+            return _error(str(e), 501)
+        response = StreamingHttpResponse(
+            _aiter_blocking(export.stream(columns, rows, fmt, compress)),
+            content_type=export.content_type(fmt, compress),
+        )
+        filename = export.filename(dataset_id, self.part, fmt, compress)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class EventStreamView(AsyncAPIView):
+    """Server-Sent Events: dataset.created, dataset.deleted and job.progress."""
+
+    async def get(self, request):
+        response = StreamingHttpResponse(events.astream(events.start_id(request)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
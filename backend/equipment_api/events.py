@@ -0,0 +1,199 @@
+"""
+Dataset change events pushed to clients as Server-Sent Events.
+
+Events are rows in DatasetEvent, so every worker process sees them. Streams
+are only served by the async views (ASGI): each process polls the table once
+per tick for all of its streams, and is woken immediately when an event is
+published in the same process.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .executor import release_request_thread, run_blocking
+from .models import DatasetEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_EVENTS = 1000
+HEARTBEAT_SECONDS = 15
+EVENTS_BATCH = 100
+RECENT_EVENTS = 1000  # kept per process so streams that fall behind need no query
+
+_async_waiters = set()  # {(loop, asyncio.Event)} of the pollers
+_waiters_lock = threading.Lock()
+
+
+def publish(kind, **payload):
+    """Store an event and wake the pollers in this process. Returns the DatasetEvent."""
+    event = DatasetEvent.objects.create(kind=kind, payload=payload)
+    if event.pk % 100 == 0:
+        DatasetEvent.objects.filter(pk__lte=event.pk - MAX_STORED_EVENTS).delete()
+    with _waiters_lock:
+        waiters = list(_async_waiters)
+    for loop, waiter in waiters:
+        loop.call_soon_threadsafe(waiter.set)
+    return event
+
+
+def dataset_created(dataset, job_id=None):
+    return publish(
+        DatasetEvent.DATASET_CREATED,
+        id=dataset.pk,
+        job_id=job_id,
+        name=dataset.name,
+        total_count=dataset.total_count,
+        created_at=dataset.created_at.isoformat(),
+    )
+
+
+def job_progress(job_id, stage, **extra):
+    return publish(DatasetEvent.JOB_PROGRESS, job_id=job_id, stage=stage, **extra)
+
+
+def latest_event_id():
+    return DatasetEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def events_after(last_id):
+    return list(DatasetEvent.objects.filter(pk__gt=last_id).order_by('pk')[:EVENTS_BATCH])
+
+
+def format_sse(event):
+    return f"id: {event.pk}\nevent: {event.kind}\ndata: {json.dumps(event.payload)}\n\n"
+
+
+def start_id(request):
+    """Resume after Last-Event-ID (sent by EventSource on reconnect); otherwise start at now."""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _preamble(last_id):
+    # An id-only message sets the client's Last-Event-ID, so a reconnect resumes
+    # from here even if no event arrived on this connection.
+    return f"id: {last_id}\nretry: 2000\n\n"
+
+
+class _Poller:
+    """
+    Reads new events once per tick (EVENTS_POLL_SECONDS, or sooner when this
+    process publishes) for every stream on one event loop, and wakes them by
+    swapping an asyncio.Event. Runs while at least one stream is open.
+    """
+
+    def __init__(self):
+        self.last_id = None
+        self.floor = None  # every event after this id is in self.recent
+        self.recent = deque()
+        self.streams = 0
+        self.ready = asyncio.Event()
+        self.tick = asyncio.Event()
+        self.wakeup = asyncio.Event()
+
+    def since(self, last_id):
+        """Buffered events after last_id, or None if some are no longer buffered."""
+        if last_id < self.floor:
+            return None
+        events = []
+        for event in reversed(self.recent):
+            if event.pk <= last_id:
+                break
+            events.append(event)
+        events.reverse()
+        return events
+
+    def _add(self, events):
+        self.recent.extend(events)
+        self.last_id = events[-1].pk
+        while len(self.recent) > RECENT_EVENTS:
+            self.floor = self.recent.popleft().pk
+        tick, self.tick = self.tick, asyncio.Event()
+        tick.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        entry = (loop, self.wakeup)
+        with _waiters_lock:
+            _async_waiters.add(entry)
+        try:
+            while self.streams:
+                self.wakeup.clear()
+                try:
+                    if self.last_id is None:
+                        self.last_id = self.floor = await run_blocking(latest_event_id)
+                        self.ready.set()
+                    events = await run_blocking(events_after, self.last_id)
+                except Exception:
+                    logger.exception("Polling dataset events failed")
+                    events = []
+                if events:
+                    self._add(events)
+                    if len(events) == EVENTS_BATCH:
+                        continue  # more are waiting
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), settings.EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with _waiters_lock:
+                _async_waiters.discard(entry)
+            _pollers.pop(loop, None)
+
+
+_pollers = {}  # {event loop: _Poller}
+
+
+def _join_poller():
+    loop = asyncio.get_running_loop()
+    poller = _pollers.get(loop)
+    if poller is None:
+        poller = _pollers[loop] = _Poller()
+        loop.create_task(poller.run())
+    poller.streams += 1
+    return poller
+
+
+async def astream(last_id):
+    """
+    Async SSE generator for ASGI. All streams in the process share one poller,
+    so an open stream holds no thread or DB connection of its own.
+    """
+    release_request_thread()
+    poller = _join_poller()
+    try:
+        await poller.ready.wait()
+        if last_id is None:
+            last_id = poller.last_id
+        yield _preamble(last_id)
+        last_sent = time.monotonic()
+        while True:
+            tick = poller.tick
+            events = poller.since(last_id)
+            if events is None:  # resuming from before the buffer: catch up from the table
+                events = await run_blocking(events_after, last_id)
+            for event in events:
+                last_id = event.pk
+                yield format_sse(event)
+            if events:
+                last_sent = time.monotonic()
+                continue
+            idle = time.monotonic() - last_sent
+            if idle >= HEARTBEAT_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+                idle = 0
+            try:
+                await asyncio.wait_for(tick.wait(), HEARTBEAT_SECONDS - idle)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        poller.streams -= 1
@@ -0,0 +1,93 @@
+"""
+Bounded worker pools for blocking pandas / ReportLab work called from async views.
+"""
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import SyncToAsync
+from django.conf import settings
+from django.db import close_old_connections
+
+_thread_pool = None
+_process_pool = None
+
+
+def _init_process_worker():
+    """Make Django settings/apps usable in spawned worker processes."""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'equipment_visualizer.settings')
+    django.setup()
+    # These processes only do the heavy work, so pay for its imports up front.
+    from .apps import import_heavy_modules
+    import_heavy_modules()
+
+
+def _threads():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=settings.API_BLOCKING_THREADS,
+            thread_name_prefix='equipment-api-blocking',
+        )
+    return _thread_pool
+
+
+def _processes():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.API_PROCESS_WORKERS,
+            initializer=_init_process_worker,
+        )
+    return _process_pool
+
+
+def _call_in_pool(fn, *args):
+    # Pool threads outlive requests, so the request_started/finished signals never
+    # check their connections; do it around each call (CONN_MAX_AGE, dropped links).
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(fn, *args):
+    """Run fn(*args) in the bounded thread pool, keeping the caller's context (metrics spans)."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_threads(), ctx.run, _call_in_pool, fn, *args)
+
+
+async def run_cpu_bound(fn, *args):
+    """
+    Run GIL-bound work (e.g. ReportLab) in the process pool when
+    settings.API_PROCESS_WORKERS > 0, otherwise in the thread pool.
+    fn and args must be picklable in the process case.
+    """
+    if not settings.API_PROCESS_WORKERS:
+        return await run_blocking(fn, *args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_processes(), fn, *args)
+
+
+def release_request_thread():
+    """
+    Shut down the single-thread executor asgiref keeps for the current request.
+
+    Django's ASGI handler runs each request in its own ThreadSensitiveContext, and
+    the first thread-sensitive sync_to_async call in it (sync middleware, auth)
+    starts a thread that otherwise idles until the response is finished. Long-lived
+    streams call this once they start; later sync calls get a fresh executor.
+    These are asgiref internals, so this is a no-op if they are missing.
+    """
+    context_var = getattr(SyncToAsync, 'thread_sensitive_context', None)
+    executors = getattr(SyncToAsync, 'context_to_thread_executor', None)
+    context = context_var.get(None) if context_var is not None else None
+    if context is None or executors is None:
+        return
+    executor = executors.pop(context, None)
+    if executor is not None:
+        executor.shutdown(wait=False)
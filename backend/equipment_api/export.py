@@ -0,0 +1,235 @@
+"""
+Streamed exports of a dataset's rows or computed statistics as CSV, Parquet,
+Arrow IPC or XLSX, optionally gzip/zstd compressed.
+
+Rows are encoded EXPORT_CHUNK_ROWS at a time and every chunk is yielded as
+soon as it is written, so no complete output file is built in memory.
+pyarrow (Parquet/Arrow), openpyxl (XLSX) and zstandard (zstd) are optional.
+"""
+import csv
+import io
+import tempfile
+import zlib
+
+from django.conf import settings
+
+from .models import EquipmentDataset
+from .query import dataset_frame
+from .services import EXPECTED_COLUMNS
+
+# fmt -> (content type, file extension, optional module it needs)
+FORMATS = {
+    'csv': ('text/csv', 'csv', None),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', 'pyarrow'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', 'pyarrow'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx', 'openpyxl'),
+}
+COMPRESSIONS = {
+    'gzip': ('application/gzip', 'gz', None),
+    'zstd': ('application/zstd', 'zst', 'zstandard'),
+}
+STATS_COLUMNS = ['Type', 'count', 'avg_flowrate', 'avg_pressure', 'avg_temperature']
+COLUMN_TYPES = {'Equipment Name': 'str', 'Type': 'str', 'count': 'int'}  # everything else is float
+XLSX_MAX_ROWS = 1048575  # per sheet, excluding the header
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class ExportUnavailable(Exception):
+    """The requested format/compression needs an optional package that is not installed."""
+
+
+def _require(module):
+    if module is None:
+        return
+    try:
+        __import__(module)
+    except ImportError:
+        raise ExportUnavailable(f"This export needs the optional package '{module}' (pip install {module})")
+
+
+def check(fmt, compress=None):
+    """Validate format and compression up front. Raises ValueError or ExportUnavailable."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}. Expected one of: {list(FORMATS)}")
+    if compress and compress not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compress!r}. Expected one of: {list(COMPRESSIONS)}")
+    _require(FORMATS[fmt][2])
+    if compress:
+        _require(COMPRESSIONS[compress][2])
+
+
+def content_type(fmt, compress=None):
+    return COMPRESSIONS[compress][0] if compress else FORMATS[fmt][0]
+
+
+def filename(dataset_id, part, fmt, compress=None):
+    name = f"equipment_{part}_{dataset_id}.{FORMATS[fmt][1]}"
+    return f"{name}.{COMPRESSIONS[compress][1]}" if compress else name
+
+
+def dataset_rows(dataset_id):
+    """(columns, rows) of a stored dataset. Raises EquipmentDataset.DoesNotExist."""
+    rows = EquipmentDataset.objects.filter(pk=dataset_id).values_list('raw_rows', flat=True).first()
+    if rows is None:
+        raise EquipmentDataset.DoesNotExist
+    return EXPECTED_COLUMNS, rows
+
+
+def _rounded(value):
+    return round(float(value), 4) if value == value else None  # NaN -> None
+
+
+def stats_rows(dataset_id):
+    """(columns, rows): stored summary for 'All' followed by per-Type count and averages."""
+    dataset = EquipmentDataset.objects.only(
+        'total_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature',
+    ).get(pk=dataset_id)
+    rows = [{
+        'Type': 'All',
+        'count': dataset.total_count,
+        'avg_flowrate': dataset.avg_flowrate,
+        'avg_pressure': dataset.avg_pressure,
+        'avg_temperature': dataset.avg_temperature,
+    }]
+    grouped = dataset_frame(dataset_id).groupby('Type', observed=True)
+    per_type = grouped[['Flowrate', 'Pressure', 'Temperature']].mean().join(grouped.size().rename('count'))
+    for type_name, r in per_type.iterrows():
+        rows.append({
+            'Type': str(type_name),
+            'count': int(r['count']),
+            'avg_flowrate': _rounded(r['Flowrate']),
+            'avg_pressure': _rounded(r['Pressure']),
+            'avg_temperature': _rounded(r['Temperature']),
+        })
+    return STATS_COLUMNS, rows
+
+
+def _chunks(rows):
+    size = settings.EXPORT_CHUNK_ROWS
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _iter_csv(columns, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for chunk in _chunks(rows):
+        writer.writerows([r.get(c) for c in columns] for r in chunk)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+    types = {'str': pa.string(), 'int': pa.int64()}
+    return pa.schema([(c, types.get(COLUMN_TYPES.get(c), pa.float64())) for c in columns])
+
+
+def _arrow_value(value, column):
+    # Names/types read from CSV as numbers are stored as ints; the schema says string.
+    if value is None or COLUMN_TYPES.get(column) != 'str':
+        return value
+    return str(value)
+
+
+def _arrow_table(chunk, schema):
+    import pyarrow as pa
+    return pa.Table.from_pylist([{c: _arrow_value(r.get(c), c) for c in schema.names} for r in chunk], schema=schema)
+
+
+def _iter_parquet(columns, rows):
+    import pyarrow.parquet as pq
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in _chunks(rows):
+            writer.write_table(_arrow_table(chunk, schema))  # one row group per chunk
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _iter_arrow(columns, rows):
+    import pyarrow as pa
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for chunk in _chunks(rows):
+            for batch in _arrow_table(chunk, schema).to_batches():
+                writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _iter_xlsx(columns, rows):
+    # XLSX is a zip whose directory is written last, so it is spooled to a
+    # temporary file (disk beyond 8 MB) and streamed from there.
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = None
+    for i, r in enumerate(rows):
+        if i % XLSX_MAX_ROWS == 0:
+            ws = wb.create_sheet(f"rows_{i // XLSX_MAX_ROWS + 1}")
+            ws.append(columns)
+        ws.append([r.get(c) for c in columns])
+    if ws is None:
+        wb.create_sheet('rows_1').append(columns)
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            data = f.read(STREAM_CHUNK_BYTES)
+            if not data:
+                break
+            yield data
+
+
+_ENCODERS = {'csv': _iter_csv, 'parquet': _iter_parquet, 'arrow': _iter_arrow, 'xlsx': _iter_xlsx}
+
+
+def _compressor(compress):
+    if compress == 'gzip':
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    import zstandard
+    return zstandard.ZstdCompressor(level=3).compressobj()
+
+
+def stream(columns, rows, fmt, compress=None):
+    """Generator of encoded (and optionally compressed) output chunks."""
+    chunks = _ENCODERS[fmt](columns, rows)
+    if not compress:
+        yield from (c for c in chunks if c)
+        return
+    comp = _compressor(compress)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
@@ -0,0 +1,262 @@
+"""
+Request-level performance instrumentation: stage timing spans, DB query counts,
+bytes in/out, a Prometheus-format /metrics endpoint, optional Server-Timing
+headers and a per-request sampling profiler.
+
+Metrics live in process memory, so each gunicorn worker exposes its own series.
+"""
+import contextvars
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values (Prometheus semantics)."""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def _labels(self, key, extra=None):
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            for key, series in items:
+                for bound, count in zip(self.buckets, series['counts']):
+                    le = f'le="{float(bound)!r}"'  # exact; %g would print 1048576 as 1.04858e+06
+                    lines.append(f"{self.name}_bucket{self._labels(key, le)} {count}")
+                inf = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{self._labels(key, inf)} {series['count']}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{self._labels(key)} {series['count']}")
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram(
+    'equipment_api_request_duration_seconds', 'Total request handling time.',
+    ['view', 'method', 'status'], LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    'equipment_api_stage_duration_seconds', 'Time spent in a named stage of a view.',
+    ['view', 'stage'], LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'equipment_api_db_queries', 'Database queries executed per request.',
+    ['view'], QUERY_BUCKETS,
+)
+REQUEST_BYTES = Histogram(
+    'equipment_api_request_bytes', 'Request body size in bytes.',
+    ['view'], BYTES_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    'equipment_api_response_bytes', 'Response body size in bytes (non-streaming responses).',
+    ['view'], BYTES_BUCKETS,
+)
+REGISTRY = [REQUEST_SECONDS, STAGE_SECONDS, DB_QUERIES, REQUEST_BYTES, RESPONSE_BYTES]
+
+
+class RequestMetrics:
+    """Per-request collector: view label, finished spans and DB query stats."""
+
+    def __init__(self, view='unmatched'):
+        self.view = view
+        self.spans = []  # [(stage, seconds)]
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_current = contextvars.ContextVar('equipment_api_request_metrics', default=None)
+
+
+@contextmanager
+def span(stage):
+    """Time a block as a named stage of the current request (no-op outside a request besides the histogram)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        ctx = _current.get()
+        view = ctx.view if ctx is not None else 'none'
+        STAGE_SECONDS.observe(elapsed, view=view, stage=stage)
+        if ctx is not None:
+            ctx.spans.append((stage, elapsed))
+
+
+def _server_timing(ctx, total):
+    parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in ctx.spans]
+    parts.append(f"db;desc=\"{ctx.db_queries} queries\";dur={ctx.db_seconds * 1000:.2f}")
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ', '.join(parts)
+
+
+def _profile_requested(request):
+    if not getattr(settings, 'METRICS_PROFILING_ENABLED', False):
+        return None
+    mode = request.GET.get('profile') or request.headers.get('X-Profile')
+    if not mode or mode in ('0', 'false'):
+        return None
+    return 'pyinstrument' if mode == 'pyinstrument' else 'cprofile'
+
+
+def _profiled(get_response, request, mode):
+    """Run the request under a profiler and return the profile report instead of the response."""
+    if mode == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            pass  # fall back to cProfile
+        else:
+            profiler = Profiler()
+            profiler.start()
+            get_response(request)
+            profiler.stop()
+            return HttpResponse(profiler.output_html(), content_type='text/html')
+    profiler = cProfile.Profile()
+    profiler.enable()
+    get_response(request)
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(60)
+    return HttpResponse(out.getvalue(), content_type='text/plain')
+
+
+def _count_queries(execute, sql, params, many, context):
+    """Execute wrapper installed on every DB connection; charges queries to the current request."""
+    ctx = _current.get()
+    if ctx is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ctx.db_queries += 1
+        ctx.db_seconds += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    # Connection wrappers are per thread, so a per-request execute_wrapper would miss
+    # queries run via sync_to_async; the context variable follows the request instead.
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+class MetricsMiddleware:
+    """
+    Record per-request latency, DB query counts and bytes in/out.
+    Adds a Server-Timing header when settings.METRICS_SERVER_TIMING is on, and
+    returns a profile report for ?profile=1 (or ?profile=pyinstrument) when
+    settings.METRICS_PROFILING_ENABLED is on (sync/WSGI requests only).
+    Works under both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        ctx = RequestMetrics()
+        token = _current.set(ctx)
+        start = time.perf_counter()
+        try:
+            mode = _profile_requested(request)
+            if mode:
+                response = _profiled(self.get_response, request, mode)
+            else:
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, ctx, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        ctx = RequestMetrics()
+        token = _current.set(ctx)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, ctx, time.perf_counter() - start)
+
+    def _finish(self, request, response, ctx, total):
+        if request.path == '/metrics':
+            return response
+        view = ctx.view
+        REQUEST_SECONDS.observe(total, view=view, method=request.method, status=response.status_code)
+        DB_QUERIES.observe(ctx.db_queries, view=view)
+        REQUEST_BYTES.observe(int(request.META.get('CONTENT_LENGTH') or 0), view=view)
+        if not response.streaming:
+            RESPONSE_BYTES.observe(len(response.content), view=view)
+        if getattr(settings, 'METRICS_SERVER_TIMING', False):
+            response['Server-Timing'] = _server_timing(ctx, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        ctx = _current.get()
+        if ctx is not None and request.resolver_match is not None:
+            ctx.view = request.resolver_match.url_name or request.resolver_match.view_name
+        return None
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records response encoding as the 'render' stage."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def render_prometheus():
+    return '\n'.join(h.render() for h in REGISTRY) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus text exposition of this process's metrics."""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
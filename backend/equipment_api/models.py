@@ -29,3 +29,20 @@ class EquipmentDataset(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.created_at})"
+
+
+class DatasetEvent(models.Model):
+    """Lightweight change notification pushed to clients over /api/events/."""
+    DATASET_CREATED = 'dataset.created'
+    DATASET_DELETED = 'dataset.deleted'
+    JOB_PROGRESS = 'job.progress'
+
+    kind = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk}"
@@ -0,0 +1,261 @@
+"""
+Declarative queries over a stored dataset: filters, group-by, aggregates, order/limit.
+
+Each dataset's rows are decoded once into a typed (columnar) DataFrame kept in a
+small per-process LRU; queries run vectorized against it and results are cached
+by (dataset id, query hash). Stored datasets never change, only get trimmed
+(checked on every query), so neither cache needs invalidating.
+pandas is only imported once a query actually runs.
+
+Example spec:
+    {"filters": [{"column": "Type", "op": "==", "value": "Pump"},
+                 {"column": "Temperature", "op": ">", "value": 120}],
+     "group_by": "Type",
+     "aggregates": [{"func": "mean", "column": "Pressure"}],
+     "order_by": [{"column": "mean_Pressure", "desc": true}],
+     "limit": 20}
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import EquipmentDataset
+from .services import EXPECTED_COLUMNS
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+GROUP_COLUMNS = ['Type']
+STRING_COLUMNS = ['Equipment Name', 'Type']
+FILTER_OPS = ('==', '!=', '>', '>=', '<', '<=', 'in', 'not_in', 'contains')
+RANGE_OPS = ('>', '>=', '<', '<=')
+AGG_FUNCS = ('count', 'sum', 'mean', 'min', 'max', 'median', 'std')
+MAX_LIMIT = 10000
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def _check_column(column, allowed, what):
+    if column not in allowed:
+        raise ValueError(f"Unknown {what} column: {column!r}. Expected one of: {allowed}")
+
+
+def _number(column, op, value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return float(value)
+        except OverflowError:
+            pass
+    raise ValueError(f"Filter on {column!r} with {op!r} needs numeric values")
+
+
+def _string(column, op, value):
+    if not isinstance(value, str):
+        raise ValueError(f"Filter on {column!r} with {op!r} needs string values")
+    return value
+
+
+def _filter_value(column, op, value):
+    """Check a filter value against its column and op; returns it in canonical form."""
+    if op == 'contains':
+        return _string(column, op, value)
+    if op in RANGE_OPS and column not in NUMERIC_COLUMNS:
+        raise ValueError(f"Filter op {op!r} only applies to numeric columns: {NUMERIC_COLUMNS}")
+    convert = _number if column in NUMERIC_COLUMNS else _string
+    if op in ('in', 'not_in'):
+        if not isinstance(value, list):
+            raise ValueError(f"Filter op {op!r} needs a list value")
+        return [convert(column, op, v) for v in value]
+    return convert(column, op, value)
+
+
+def _list(spec, key):
+    value = spec.get(key) or []
+    if not isinstance(value, list):
+        raise ValueError(f"{key} must be a list")
+    return value
+
+
+def normalize(spec):
+    """
+    Validate a query spec and return it in canonical form. Raises ValueError.
+    Anything that passes can be executed without further errors.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("Query must be a JSON object")
+    unknown = set(spec) - {'filters', 'group_by', 'aggregates', 'order_by', 'limit'}
+    if unknown:
+        raise ValueError(f"Unknown query keys: {sorted(unknown)}")
+
+    filters = []
+    for f in _list(spec, 'filters'):
+        if not isinstance(f, dict):
+            raise ValueError("Each filter must be an object with column, op and value")
+        column, op, value = f.get('column'), f.get('op', '=='), f.get('value')
+        _check_column(column, EXPECTED_COLUMNS, 'filter')
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter op: {op!r}. Expected one of: {list(FILTER_OPS)}")
+        filters.append({'column': column, 'op': op, 'value': _filter_value(column, op, value)})
+
+    group_by = spec.get('group_by')
+    if group_by is not None:
+        _check_column(group_by, GROUP_COLUMNS, 'group_by')
+
+    aggregates = []
+    for a in _list(spec, 'aggregates'):
+        if not isinstance(a, dict):
+            raise ValueError("Each aggregate must be an object with func and column")
+        func, column = a.get('func'), a.get('column')
+        if func not in AGG_FUNCS:
+            raise ValueError(f"Unknown aggregate func: {func!r}. Expected one of: {list(AGG_FUNCS)}")
+        alias = a.get('as', f"{func}_{column}" if column else func)
+        if not isinstance(alias, str) or not alias:
+            raise ValueError("Aggregate 'as' must be a non-empty string")
+        if alias == group_by or alias in [other['as'] for other in aggregates]:
+            raise ValueError(f"Duplicate output column: {alias!r}")
+        if func == 'count' and column is None:
+            column = 'Equipment Name'
+        _check_column(column, EXPECTED_COLUMNS if func == 'count' else NUMERIC_COLUMNS, 'aggregate')
+        aggregates.append({'func': func, 'column': column, 'as': alias})
+
+    order_by = []
+    for o in _list(spec, 'order_by'):
+        if isinstance(o, str):
+            o = {'column': o.lstrip('-'), 'desc': o.startswith('-')}
+        if not isinstance(o, dict) or not isinstance(o.get('column'), str):
+            raise ValueError("Each order_by entry must be a column name or {column, desc}")
+        order_by.append({'column': o['column'], 'desc': bool(o.get('desc', False))})
+    output_columns = _output_columns(group_by, aggregates)
+    for o in order_by:
+        _check_column(o['column'], output_columns, 'order_by')
+
+    limit = spec.get('limit', 1000)
+    if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be an integer between 1 and {MAX_LIMIT}")
+
+    return {'filters': filters, 'group_by': group_by, 'aggregates': aggregates, 'order_by': order_by, 'limit': limit}
+
+
+def _output_columns(group_by, aggregates):
+    if aggregates:
+        return ([group_by] if group_by else []) + [a['as'] for a in aggregates]
+    return list(EXPECTED_COLUMNS)
+
+
+def query_hash(normalized):
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def build_frame(rows):
+    """Columnar DataFrame from raw_rows: float64 numerics, str names, categorical Type."""
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(rows, columns=EXPECTED_COLUMNS)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in STRING_COLUMNS:
+        df[col] = df[col].map(str, na_action='ignore')  # e.g. numeric names stored as ints
+    df['Type'] = df['Type'].astype('category')
+    return df
+
+
+def dataset_frame(dataset_id):
+    """Cached DataFrame for a dataset. Raises EquipmentDataset.DoesNotExist."""
+    with _frames_lock:
+        df = _frames.get(dataset_id)
+        if df is not None:
+            _frames.move_to_end(dataset_id)
+            return df
+    rows = EquipmentDataset.objects.filter(pk=dataset_id).values_list('raw_rows', flat=True).first()
+    if rows is None:
+        raise EquipmentDataset.DoesNotExist
+    df = build_frame(rows)
+    with _frames_lock:
+        _frames[dataset_id] = df
+        while len(_frames) > settings.QUERY_FRAME_CACHE_SIZE:
+            _frames.popitem(last=False)
+    return df
+
+
+def _mask(df, f):
+    col, op, value = df[f['column']], f['op'], f['value']
+    if op == '==':
+        return col == value
+    if op == '!=':
+        return col != value
+    if op == '>':
+        return col > value
+    if op == '>=':
+        return col >= value
+    if op == '<':
+        return col < value
+    if op == '<=':
+        return col <= value
+    if op == 'in':
+        return col.isin(value)
+    if op == 'not_in':
+        return ~col.isin(value)
+    return col.astype(str).str.contains(str(value), regex=False)
+
+
+def execute(df, q):
+    """Run a normalized query against a dataset frame. Returns (columns, rows)."""
+    import pandas as pd
+
+    if q['filters']:
+        mask = _mask(df, q['filters'][0])
+        for f in q['filters'][1:]:
+            mask &= _mask(df, f)
+        df = df[mask]
+
+    if q['aggregates']:
+        named = {a['as']: (a['column'], a['func']) for a in q['aggregates']}
+        if q['group_by']:
+            out = df.groupby(q['group_by'], observed=True).agg(**named).reset_index()
+        else:
+            out = pd.DataFrame([{name: df[col].agg(func) for name, (col, func) in named.items()}])
+    else:
+        out = df
+
+    per_group = q['group_by'] and not q['aggregates']
+    order = q['order_by']
+    if len(order) == 1 and not per_group and pd.api.types.is_numeric_dtype(out[order[0]['column']]):
+        # Top-N selection without a full sort.
+        pick = out.nlargest if order[0]['desc'] else out.nsmallest
+        out = pick(q['limit'], order[0]['column'])
+    else:
+        if order:
+            out = out.sort_values(
+                [o['column'] for o in order],
+                ascending=[not o['desc'] for o in order],
+                kind='stable',
+            )
+        if per_group:
+            out = out.groupby(q['group_by'], observed=True, sort=False).head(q['limit'])  # top N per group
+        else:
+            out = out.head(q['limit'])
+
+    columns = list(out.columns)
+    out = out.astype(object).where(out.notna(), None)
+    return columns, out.to_dict(orient='records')
+
+
+def run_query(dataset_id, spec):
+    """
+    Validate, execute (or fetch from cache) a query on a dataset.
+    Raises ValueError for bad specs and EquipmentDataset.DoesNotExist.
+    """
+    q = normalize(spec)
+    if not EquipmentDataset.objects.filter(pk=dataset_id).exists():
+        raise EquipmentDataset.DoesNotExist  # may have been trimmed since it was cached
+    digest = query_hash(q)
+    key = f"equipment_api:query:{dataset_id}:{digest}"
+    result = cache.get(key)
+    if result is None:
+        columns, rows = execute(dataset_frame(dataset_id), q)
+        result = {'dataset_id': dataset_id, 'query_hash': digest, 'columns': columns, 'row_count': len(rows), 'rows': rows}
+        cache.set(key, result, settings.QUERY_CACHE_SECONDS)
+    return result
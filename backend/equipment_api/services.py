@@ -1,9 +1,13 @@
 """
 CSV parsing and analytics using Pandas.
+
+pandas is imported on first use, so views that never parse a CSV (history,
+summary) don't load it.
 """
-import pandas as pd
 from django.conf import settings
 
+from .metrics import span
+
 
 EXPECTED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
 
@@ -19,8 +23,11 @@ def parse_and_analyze(file_obj):
     Read CSV into DataFrame, validate columns, compute summary.
     Returns (summary_dict, rows_list) or raises ValueError.
     """
+    import pandas as pd
+
     try:
-        df = pd.read_csv(file_obj)
+        with span('read_csv'):
+            df = pd.read_csv(file_obj)
     except Exception as e:
         raise ValueError(f"Invalid CSV: {e}")
 
@@ -40,13 +47,14 @@ def parse_and_analyze(file_obj):
     avg_temperature = df['Temperature'].mean()
     type_distribution = df['Type'].value_counts().to_dict()
 
-    rows = df.to_dict(orient='records')
-    for r in rows:
-        for k, v in r.items():
-            if pd.isna(v):
-                r[k] = None
-            elif isinstance(v, (float,)):
-                r[k] = round(float(v), 4) if v == v else None  # avoid NaN
+    with span('rows'):
+        rows = df.to_dict(orient='records')
+        for r in rows:
+            for k, v in r.items():
+                if pd.isna(v):
+                    r[k] = None
+                elif isinstance(v, (float,)):
+                    r[k] = round(float(v), 4) if v == v else None  # avoid NaN
 
     summary = {
         'total_count': int(total_count),
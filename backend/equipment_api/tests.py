@@ -0,0 +1,567 @@
+import asyncio
+import base64
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from asgiref.sync import SyncToAsync, ThreadSensitiveContext, async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from . import async_views, events, metrics, query, views
+from .executor import release_request_thread, run_blocking
+from .models import EquipmentDataset
+
+ROWS = [
+    {'Equipment Name': 'P-1', 'Type': 'Pump', 'Flowrate': 120.0, 'Pressure': 5.0, 'Temperature': 110.0},
+    {'Equipment Name': 'P-2', 'Type': 'Pump', 'Flowrate': 150.0, 'Pressure': 6.0, 'Temperature': 130.0},
+    {'Equipment Name': 'V-1', 'Type': 'Valve', 'Flowrate': 60.0, 'Pressure': 4.0, 'Temperature': 100.0},
+    {'Equipment Name': 'R-1', 'Type': 'Reactor', 'Flowrate': None, 'Pressure': 9.0, 'Temperature': 180.0},
+]
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / 'sample_equipment_data.csv'
+
+
+def installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def make_dataset(rows=ROWS, name='test'):
+    return EquipmentDataset.objects.create(
+        name=name,
+        total_count=len(rows),
+        avg_flowrate=110.0,
+        avg_pressure=6.0,
+        avg_temperature=130.0,
+        type_distribution={'Pump': 2, 'Valve': 1, 'Reactor': 1},
+        raw_rows=rows,
+    )
+
+
+class QueryViewTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        query._frames.clear()
+        self.dataset = make_dataset()
+        self.url = f'/api/query/{self.dataset.pk}/'
+
+    def post(self, spec):
+        return self.client.post(self.url, spec, format='json')
+
+    def test_filter_order_limit(self):
+        response = self.post({
+            'filters': [{'column': 'Type', 'op': '==', 'value': 'Pump'},
+                        {'column': 'Temperature', 'op': '>', 'value': 100}],
+            'order_by': ['-Flowrate'],
+            'limit': 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['row_count'], 1)
+        self.assertEqual(response.data['rows'][0]['Equipment Name'], 'P-2')
+
+    def test_in_and_contains(self):
+        response = self.post({'filters': [{'column': 'Type', 'op': 'in', 'value': ['Valve', 'Reactor']},
+                                          {'column': 'Equipment Name', 'op': 'contains', 'value': '-1'}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(r['Equipment Name'] for r in response.data['rows']), ['R-1', 'V-1'])
+
+    def test_group_by_aggregates(self):
+        response = self.post({
+            'group_by': 'Type',
+            'aggregates': [{'func': 'count'}, {'func': 'mean', 'column': 'Pressure', 'as': 'pressure'}],
+            'order_by': [{'column': 'pressure', 'desc': True}],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['columns'], ['Type', 'count', 'pressure'])
+        self.assertEqual(response.data['rows'], [
+            {'Type': 'Reactor', 'count': 1, 'pressure': 9.0},
+            {'Type': 'Pump', 'count': 2, 'pressure': 5.5},
+            {'Type': 'Valve', 'count': 1, 'pressure': 4.0},
+        ])
+
+    def test_limit_per_group(self):
+        response = self.post({'group_by': 'Type', 'order_by': ['-Flowrate'], 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(r['Equipment Name'] for r in response.data['rows']), ['P-2', 'R-1', 'V-1'])
+
+    def test_nan_becomes_null(self):
+        response = self.post({'filters': [{'column': 'Type', 'op': '==', 'value': 'Reactor'}]})
+        self.assertIsNone(response.data['rows'][0]['Flowrate'])
+
+    def test_numeric_names_are_strings(self):
+        dataset = make_dataset([{'Equipment Name': 101, 'Type': 7, 'Flowrate': 1.0, 'Pressure': 2.0, 'Temperature': 3.0}])
+        response = self.client.post(f'/api/query/{dataset.pk}/', {
+            'filters': [{'column': 'Type', 'op': '==', 'value': '7'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rows'][0]['Equipment Name'], '101')
+
+    def test_invalid_specs(self):
+        invalid = [
+            [],
+            {'unknown': 1},
+            {'filters': 5},
+            {'filters': ['Type']},
+            {'filters': [{'column': 'Color', 'op': '==', 'value': 'red'}]},
+            {'filters': [{'column': 'Type', 'op': '~', 'value': 'Pump'}]},
+            {'filters': [{'column': 'Type', 'op': '>', 'value': 5}]},
+            {'filters': [{'column': 'Type', 'op': '>', 'value': 'Pump'}]},
+            {'filters': [{'column': 'Equipment Name', 'op': '>', 'value': 5}]},
+            {'filters': [{'column': 'Type', 'op': '==', 'value': 5}]},
+            {'filters': [{'column': 'Type', 'op': 'in', 'value': 'Pump'}]},
+            {'filters': [{'column': 'Type', 'op': 'in', 'value': [[1]]}]},
+            {'filters': [{'column': 'Flowrate', 'op': 'in', 'value': ['a']}]},
+            {'filters': [{'column': 'Flowrate', 'op': '>', 'value': True}]},
+            {'filters': [{'column': 'Flowrate', 'op': '>', 'value': 10 ** 400}]},
+            {'filters': [{'column': 'Type', 'op': 'contains', 'value': 1}]},
+            {'group_by': 'Flowrate'},
+            {'aggregates': [{'func': 'mode', 'column': 'Flowrate'}]},
+            {'aggregates': [{'func': 'sum', 'column': 'Type'}]},
+            {'aggregates': [{'func': 'sum', 'column': 'Flowrate', 'as': {'a': 1}}]},
+            {'aggregates': [{'func': 'sum', 'column': 'Flowrate', 'as': ''}]},
+            {'group_by': 'Type', 'aggregates': [{'func': 'sum', 'column': 'Flowrate', 'as': 'Type'}]},
+            {'aggregates': [{'func': 'sum', 'column': 'Flowrate', 'as': 'x'},
+                            {'func': 'mean', 'column': 'Flowrate', 'as': 'x'}]},
+            {'aggregates': [{'func': 'count'}], 'order_by': ['Flowrate']},
+            {'order_by': [5]},
+            {'limit': 0},
+            {'limit': 10001},
+            {'limit': True},
+        ]
+        for spec in invalid:
+            with self.subTest(spec=spec):
+                response = self.post(spec)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+
+    def test_missing_dataset(self):
+        response = self.client.post('/api/query/999999/', {}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_result_is_cached(self):
+        spec = {'group_by': 'Type', 'aggregates': [{'func': 'count'}]}
+        with mock.patch.object(query, 'execute', wraps=query.execute) as execute:
+            first = self.post(spec)
+            second = self.post(spec)
+        self.assertEqual(execute.call_count, 1)
+        self.assertEqual(first.data, second.data)
+
+    def test_trimmed_dataset_not_served_from_cache(self):
+        spec = {'aggregates': [{'func': 'count'}]}
+        self.assertEqual(self.post(spec).status_code, 200)
+        self.dataset.delete()
+        self.assertEqual(self.post(spec).status_code, 404)
+
+
+@override_settings(EXPORT_CHUNK_ROWS=2)  # several chunks per export
+class ExportViewTests(APITestCase):
+    # Numeric names/types are stored as ints and must still export as strings.
+    rows = ROWS + [{'Equipment Name': 101, 'Type': 7, 'Flowrate': 1.0, 'Pressure': 2.0, 'Temperature': 3.0}]
+
+    def setUp(self):
+        query._frames.clear()
+        self.dataset = make_dataset(self.rows)
+
+    def download(self, fmt, part='', **params):
+        response = self.client.get(f'/api/export/{self.dataset.pk}/{part}{fmt}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def expected_names(self):
+        return [str(r['Equipment Name']) for r in self.rows]
+
+    def test_csv(self):
+        response, body = self.download('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn(f'equipment_rows_{self.dataset.pk}.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([r['Equipment Name'] for r in rows], self.expected_names())
+
+    @skipUnless(installed('pyarrow'), 'pyarrow not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+        _, body = self.download('parquet')
+        table = pq.read_table(io.BytesIO(body))
+        self.assertEqual(table.column('Equipment Name').to_pylist(), self.expected_names())
+        self.assertEqual(table.column('Flowrate').to_pylist()[3], None)
+
+    @skipUnless(installed('pyarrow'), 'pyarrow not installed')
+    def test_arrow(self):
+        import pyarrow as pa
+        _, body = self.download('arrow')
+        table = pa.ipc.open_stream(body).read_all()
+        self.assertEqual(table.column('Type').to_pylist()[-1], '7')
+        self.assertEqual(table.num_rows, len(self.rows))
+
+    @skipUnless(installed('openpyxl'), 'openpyxl not installed')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+        _, body = self.download('xlsx')
+        sheet = load_workbook(io.BytesIO(body), read_only=True).active
+        values = list(sheet.values)
+        self.assertEqual(values[0][0], 'Equipment Name')
+        self.assertEqual(len(values), len(self.rows) + 1)
+
+    def test_stats_csv(self):
+        _, body = self.download('csv', part='stats/')
+        rows = {r['Type']: r for r in csv.DictReader(io.StringIO(body.decode()))}
+        self.assertEqual(rows['All']['count'], str(len(self.rows)))
+        self.assertEqual(rows['Pump']['count'], '2')
+        self.assertEqual(float(rows['Pump']['avg_flowrate']), 135.0)
+
+    def test_gzip(self):
+        response, body = self.download('csv', compress='gzip')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        self.assertTrue(gzip.decompress(body).startswith(b'Equipment Name,Type'))
+
+    @skipUnless(installed('zstandard') and installed('pyarrow'), 'zstandard/pyarrow not installed')
+    def test_zstd_parquet(self):
+        import pyarrow.parquet as pq
+        import zstandard
+        _, body = self.download('parquet', compress='zstd')
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        self.assertEqual(pq.read_table(io.BytesIO(data)).num_rows, len(self.rows))
+
+    def test_bad_format_or_compression(self):
+        for url in (f'/api/export/{self.dataset.pk}/pdf/', f'/api/export/{self.dataset.pk}/csv/?compress=bz2'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_missing_dataset(self):
+        self.assertEqual(self.client.get('/api/export/999999/csv/').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/999999/stats/csv/').status_code, 404)
+
+    def test_missing_optional_package(self):
+        with mock.patch.dict(sys.modules, {'pyarrow': None}):  # makes `import pyarrow` fail
+            response = self.client.get(f'/api/export/{self.dataset.pk}/parquet/')
+        self.assertEqual(response.status_code, 501)
+        self.assertIn('pyarrow', response.json()['error'])
+
+
+class EventStreamViewTests(APITestCase):
+
+    def test_sync_views_do_not_stream(self):
+        # A stream would hold a sync worker; 204 makes EventSource stop reconnecting.
+        response = self.client.get('/api/events/', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+
+@override_settings(EVENTS_POLL_SECONDS=0.05)
+class EventPollerTests(TransactionTestCase):
+    # TransactionTestCase: the poller reads events from the worker pool's own connections.
+
+    async def next_event(self, stream):
+        return await asyncio.wait_for(anext(stream), 5)
+
+    async def publish(self, stage='parsing'):
+        return await sync_to_async(events.job_progress)('job', stage)
+
+    async def wait_for_poller_exit(self):
+        loop = asyncio.get_running_loop()
+        for _ in range(100):
+            if loop not in events._pollers:
+                return
+            await asyncio.sleep(0.05)
+        self.fail('poller still running')
+
+    async def test_stream_receives_published_events(self):
+        stream = events.astream(None)
+        self.assertEqual(await self.next_event(stream), 'id: 0\nretry: 2000\n\n')
+        event = await self.publish()
+        chunk = await self.next_event(stream)
+        self.assertTrue(chunk.startswith(f'id: {event.pk}\nevent: job.progress\n'))
+        self.assertIn('"stage": "parsing"', chunk)
+        await stream.aclose()
+
+    async def test_resume_from_before_buffer(self):
+        published = [await self.publish(stage) for stage in ('a', 'b', 'c')]
+        stream = events.astream(0)
+        self.assertEqual(await self.next_event(stream), 'id: 0\nretry: 2000\n\n')
+        self.assertEqual(events._pollers[asyncio.get_running_loop()].floor, published[-1].pk)
+        ids = [int((await self.next_event(stream)).split('\n')[0][4:]) for _ in published]
+        self.assertEqual(ids, [e.pk for e in published])
+        await stream.aclose()
+
+    async def test_closing_last_stream_stops_poller(self):
+        stream = events.astream(None)
+        await self.next_event(stream)
+        poller = events._pollers[asyncio.get_running_loop()]
+        self.assertEqual(poller.streams, 1)
+        await stream.aclose()
+        self.assertEqual(poller.streams, 0)
+        await self.wait_for_poller_exit()
+        self.assertEqual(events._async_waiters, set())
+
+    async def test_streams_share_one_poller(self):
+        loop = asyncio.get_running_loop()
+        first, second = events.astream(None), events.astream(None)
+        await self.next_event(first)
+        poller = events._pollers[loop]
+        await self.next_event(second)
+        self.assertIs(events._pollers[loop], poller)
+        self.assertEqual(poller.streams, 2)
+        self.assertEqual(len(events._async_waiters), 1)
+        event = await self.publish()
+        for stream in (first, second):
+            self.assertTrue((await self.next_event(stream)).startswith(f'id: {event.pk}\n'))
+        await first.aclose()
+        self.assertEqual(poller.streams, 1)
+        await second.aclose()
+        await self.wait_for_poller_exit()
+
+
+class RunBlockingTests(SimpleTestCase):
+
+    async def test_checks_connections_around_each_call(self):
+        calls = []
+        with mock.patch('equipment_api.executor.close_old_connections', lambda: calls.append('check')):
+            self.assertEqual(await run_blocking(lambda x: calls.append('call') or x * 2, 21), 42)
+            with self.assertRaises(ZeroDivisionError):
+                await run_blocking(lambda: 1 / 0)
+        self.assertEqual(calls, ['check', 'call', 'check', 'check', 'check'])
+
+
+class ReleaseRequestThreadTests(SimpleTestCase):
+
+    async def test_shuts_down_request_executor(self):
+        async with ThreadSensitiveContext():
+            context = SyncToAsync.thread_sensitive_context.get()
+            executor = ThreadPoolExecutor(max_workers=1)
+            SyncToAsync.context_to_thread_executor[context] = executor
+            release_request_thread()
+            self.assertNotIn(context, SyncToAsync.context_to_thread_executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(int)  # shut down
+
+    async def test_outside_request_context(self):
+        release_request_thread()
+
+    def test_missing_asgiref_internals(self):
+        with mock.patch('equipment_api.executor.SyncToAsync', object()):
+            release_request_thread()
+
+
+class AuthParityTests(APITestCase):
+    """The ASGI views must authenticate, authorize and pick 401 vs 403 like the DRF ones."""
+
+    def setUp(self):
+        User.objects.create_user('alice', password='secret')
+
+    def get(self, view_class, credentials=None):
+        headers = {}
+        if credentials:
+            headers['Authorization'] = 'Basic ' + base64.b64encode(credentials.encode()).decode()
+        if issubclass(view_class, async_views.AsyncAPIView):
+            request = AsyncRequestFactory().get('/api/history/', headers=headers)
+            return async_to_sync(view_class.as_view())(request)
+        return view_class.as_view()(APIRequestFactory().get('/api/history/', headers=headers))
+
+    def assertSameStatus(self, expected, credentials=None, www_authenticate=None):
+        for view_class in (views.HistoryListView, async_views.HistoryListView):
+            with self.subTest(view=view_class.__module__):
+                response = self.get(view_class, credentials)
+                self.assertEqual(response.status_code, expected)
+                self.assertEqual(response.get('WWW-Authenticate'), www_authenticate)
+
+    def patch_views(self, **attrs):
+        for view_class in (views.HistoryListView, async_views.HistoryListView):
+            for name, value in attrs.items():
+                patcher = mock.patch.object(view_class, name, value)
+                patcher.start()
+                self.addCleanup(patcher.stop)
+
+    def test_anonymous_allowed(self):
+        self.assertSameStatus(200)
+
+    def test_valid_credentials(self):
+        self.assertSameStatus(200, 'alice:secret')
+
+    def test_bad_credentials_session_first(self):
+        # SessionAuthentication has no WWW-Authenticate header, so DRF answers 403.
+        self.assertSameStatus(403, 'alice:wrong')
+
+    def test_bad_credentials_basic_first(self):
+        self.patch_views(authentication_classes=[BasicAuthentication, SessionAuthentication])
+        self.assertSameStatus(401, 'alice:wrong', www_authenticate='Basic realm="api"')
+
+    def test_permission_classes(self):
+        self.patch_views(permission_classes=[IsAuthenticated])
+        self.assertSameStatus(403)
+        self.assertSameStatus(200, 'alice:secret')
+        self.patch_views(authentication_classes=[BasicAuthentication])
+        self.assertSameStatus(401, www_authenticate='Basic realm="api"')
+
+
+class AsyncViewTests(TransactionTestCase):
+    """The ASGI views, called directly; they read the DB from the worker pool too."""
+
+    def setUp(self):
+        query._frames.clear()
+        self.dataset = make_dataset()
+
+    async def call(self, view, request, **kwargs):
+        response = await view(request, **kwargs)
+        if response.streaming:
+            response.body = b''.join([chunk async for chunk in response.streaming_content])
+        return response
+
+    def upload(self, view_class, factory, content):
+        request = factory.post('/api/upload/', {'file': SimpleUploadedFile('plant.csv', content), 'name': 'plant'})
+        if issubclass(view_class, async_views.AsyncAPIView):
+            response = async_to_sync(view_class.as_view())(request)
+            return response.status_code, json.loads(response.content)
+        response = view_class.as_view()(request)
+        return response.status_code, json.loads(response.render().content)
+
+    def test_upload_matches_sync_view(self):
+        content = SAMPLE_CSV.read_bytes()
+        status, sync_body = self.upload(views.CSVUploadView, APIRequestFactory(), content)
+        self.assertEqual(status, 201)
+        status, async_body = self.upload(async_views.CSVUploadView, AsyncRequestFactory(), content)
+        self.assertEqual(status, 201)
+        self.assertNotEqual(async_body.pop('id'), sync_body.pop('id'))
+        async_body.pop('created_at'), sync_body.pop('created_at')
+        self.assertEqual(async_body, sync_body)
+        self.assertEqual(async_body['name'], 'plant')
+
+    def test_upload_bad_csv(self):
+        status, body = self.upload(async_views.CSVUploadView, AsyncRequestFactory(), b'Name,Color\nP-1,red\n')
+        self.assertEqual(status, 400)
+        self.assertIn('Missing columns', body['error'])
+        request = AsyncRequestFactory().post('/api/upload/', {'name': 'empty'})
+        self.assertEqual(async_to_sync(async_views.CSVUploadView.as_view())(request).status_code, 400)
+
+    async def test_pdf_is_streamed(self):
+        request = AsyncRequestFactory().get('/')
+        response = await self.call(async_views.PDFReportView.as_view(), request, dataset_id=self.dataset.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.body.startswith(b'%PDF'))
+        self.assertEqual(int(response['Content-Length']), len(response.body))
+        response = await self.call(async_views.PDFReportView.as_view(), request, dataset_id=999999)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_query(self):
+        view = async_views.DatasetQueryView.as_view()
+
+        def post(body, dataset_id=self.dataset.pk):
+            request = AsyncRequestFactory().post('/', body, content_type='application/json')
+            return self.call(view, request, dataset_id=dataset_id)
+
+        spec = json.dumps({'group_by': 'Type', 'aggregates': [{'func': 'count'}], 'order_by': ['Type']})
+        response = await post(spec)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['rows'], [
+            {'Type': 'Pump', 'count': 2}, {'Type': 'Reactor', 'count': 1}, {'Type': 'Valve', 'count': 1},
+        ])
+        self.assertEqual((await post('{')).status_code, 400)
+        self.assertEqual((await post(json.dumps({'limit': 0}))).status_code, 400)
+        self.assertEqual((await post(spec, dataset_id=999999)).status_code, 404)
+
+    async def test_export(self):
+        def get(fmt, dataset_id=self.dataset.pk, part='rows', **params):
+            request = AsyncRequestFactory().get('/', params)
+            view = async_views.DatasetExportView.as_view(part=part)
+            return self.call(view, request, dataset_id=dataset_id, fmt=fmt)
+
+        response = await get('csv', compress='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.body).decode())))
+        self.assertEqual([r['Equipment Name'] for r in rows], [r['Equipment Name'] for r in ROWS])
+        response = await get('csv', part='stats')
+        self.assertIn(f'equipment_stats_{self.dataset.pk}.csv', response['Content-Disposition'])
+        self.assertIn(b'All,4,', response.body)
+        self.assertEqual((await get('pdf')).status_code, 400)
+        self.assertEqual((await get('csv', compress='bz2')).status_code, 400)
+        self.assertEqual((await get('csv', dataset_id=999999)).status_code, 404)
+
+
+class MetricsTests(APITestCase):
+
+    def test_histogram_exposition(self):
+        histogram = metrics.Histogram('test_bytes', 'Test sizes.', ['view'], metrics.BYTES_BUCKETS)
+        histogram.observe(1048576, view='a"b')
+        histogram.observe(1048577, view='a"b')
+        lines = histogram.render().splitlines()
+        self.assertEqual(lines[:2], ['# HELP test_bytes Test sizes.', '# TYPE test_bytes histogram'])
+        self.assertEqual(lines[2:], [
+            'test_bytes_bucket{view="a\\"b",le="1024.0"} 0',
+            'test_bytes_bucket{view="a\\"b",le="10240.0"} 0',
+            'test_bytes_bucket{view="a\\"b",le="102400.0"} 0',
+            'test_bytes_bucket{view="a\\"b",le="1048576.0"} 1',
+            'test_bytes_bucket{view="a\\"b",le="10485760.0"} 2',
+            'test_bytes_bucket{view="a\\"b",le="104857600.0"} 2',
+            'test_bytes_bucket{view="a\\"b",le="+Inf"} 2',
+            'test_bytes_sum{view="a\\"b"} 2097153.000000',
+            'test_bytes_count{view="a\\"b"} 2',
+        ])
+
+    def test_latency_bucket_labels(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', [], metrics.LATENCY_BUCKETS)
+        histogram.observe(0.003)
+        self.assertIn('test_seconds_bucket{le="0.0025"} 0', histogram.render())
+        self.assertIn('test_seconds_bucket{le="0.005"} 1', histogram.render())
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/history/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('equipment_api_request_duration_seconds_count{view="history",method="GET",status="200"}', body)
+        self.assertIn('# TYPE equipment_api_db_queries histogram', body)
+
+    def test_db_queries_are_counted(self):
+        connection.ensure_connection()
+        self.assertIn(metrics._count_queries, connection.execute_wrappers)
+        ctx = metrics.RequestMetrics()
+        token = metrics._current.set(ctx)
+        try:
+            EquipmentDataset.objects.count()
+            list(EquipmentDataset.objects.all())
+        finally:
+            metrics._current.reset(token)
+        self.assertEqual(ctx.db_queries, 2)
+        self.assertGreater(ctx.db_seconds, 0)
+        EquipmentDataset.objects.count()  # outside a request: not charged to anyone
+        self.assertEqual(ctx.db_queries, 2)
+
+    def test_no_server_timing_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/history/'))
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing(self):
+        make_dataset()
+        response = self.client.get('/api/history/')
+        timings = [part.split(';')[0] for part in response['Server-Timing'].split(', ')]
+        self.assertEqual(timings[0], 'db_read')
+        self.assertIn('serialize', timings)
+        self.assertEqual(timings[-2:], ['db', 'total'])
+        self.assertRegex(response['Server-Timing'], r'db;desc="[1-9]\d* queries";dur=')
+
+    def test_profiling_off_by_default(self):
+        response = self.client.get('/api/history/?profile=1')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    @override_settings(METRICS_PROFILING_ENABLED=True)
+    def test_profiling(self):
+        response = self.client.get('/api/history/?profile=1')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn(b'function calls', response.content)
@@ -1,9 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+
+if settings.API_ASYNC_VIEWS:
+    from . import async_views as views
+else:
+    from . import views
 
 urlpatterns = [
     path('upload/', views.CSVUploadView.as_view(), name='upload'),
     path('summary/<int:dataset_id>/', views.SummaryView.as_view(), name='summary'),
     path('history/', views.HistoryListView.as_view(), name='history'),
     path('report/<int:dataset_id>/pdf/', views.PDFReportView.as_view(), name='report-pdf'),
+    path('query/<int:dataset_id>/', views.DatasetQueryView.as_view(), name='query'),
+    path('export/<int:dataset_id>/<str:fmt>/', views.DatasetExportView.as_view(), name='export'),
+    path('export/<int:dataset_id>/stats/<str:fmt>/', views.DatasetExportView.as_view(part='stats'), name='export-stats'),
+    path('events/', views.EventStreamView.as_view(), name='events'),
 ]
@@ -1,16 +1,22 @@
 """
 API views: CSV upload, summary, history (last 5), PDF report.
 """
-from django.http import HttpResponse
+import uuid
+
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import EquipmentDataset
+from . import events, export
+from .metrics import span
+from .models import DatasetEvent, EquipmentDataset
 from .serializers import EquipmentDatasetSerializer
 from .services import parse_and_analyze
 from .pdf_report import build_pdf_report
+from .query import run_query
 
 MAX_STORED_DATASETS = 5
 
@@ -24,21 +30,28 @@ def trim_to_last_n(user=None):
     to_delete = list(qs[MAX_STORED_DATASETS:].values_list('id', flat=True))
     if to_delete:
         EquipmentDataset.objects.filter(id__in=to_delete).delete()
+        for dataset_id in to_delete:
+            events.publish(DatasetEvent.DATASET_DELETED, id=dataset_id)
 
 
 class CSVUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request):
-        file_obj = request.FILES.get('file') or request.data.get('file')
+        with span('multipart'):
+            file_obj = request.FILES.get('file') or request.data.get('file')
         if not file_obj:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         name = request.data.get('name', file_obj.name or 'Untitled')
+        job_id = request.data.get('job_id') or uuid.uuid4().hex
 
+        events.job_progress(job_id, 'parsing')
         try:
             summary = parse_and_analyze(file_obj)
         except ValueError as e:
+            events.job_progress(job_id, 'failed', error=str(e))
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        events.job_progress(job_id, 'saving')
 
         dataset = EquipmentDataset(
             name=name,
@@ -50,11 +63,15 @@ class CSVUploadView(APIView):
             type_distribution=summary.get('type_distribution', {}),
             raw_rows=summary.get('raw_rows', []),
         )
-        dataset.save()
-        trim_to_last_n(request.user)
+        with span('db_write'):
+            dataset.save()
+        events.dataset_created(dataset, job_id)
+        with span('trim'):
+            trim_to_last_n(request.user)
 
-        serializer = EquipmentDatasetSerializer(dataset)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        with span('serialize'):
+            data = EquipmentDatasetSerializer(dataset).data
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
 class SummaryView(APIView):
@@ -62,20 +79,24 @@ class SummaryView(APIView):
 
     def get(self, request, dataset_id):
         try:
-            dataset = EquipmentDataset.objects.get(pk=dataset_id)
+            with span('db_read'):
+                dataset = EquipmentDataset.objects.get(pk=dataset_id)
         except EquipmentDataset.DoesNotExist:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
-        serializer = EquipmentDatasetSerializer(dataset)
-        return Response(serializer.data)
+        with span('serialize'):
+            data = EquipmentDatasetSerializer(dataset).data
+        return Response(data)
 
 
 class HistoryListView(APIView):
     """List last 5 uploaded datasets."""
 
     def get(self, request):
-        qs = EquipmentDataset.objects.all().order_by('-created_at')[:MAX_STORED_DATASETS]
-        serializer = EquipmentDatasetSerializer(qs, many=True)
-        return Response(serializer.data)
+        with span('db_read'):
+            datasets = list(EquipmentDataset.objects.all().order_by('-created_at')[:MAX_STORED_DATASETS])
+        with span('serialize'):
+            data = EquipmentDatasetSerializer(datasets, many=True).data
+        return Response(data)
 
 
 class PDFReportView(APIView):
@@ -83,10 +104,78 @@ class PDFReportView(APIView):
 
     def get(self, request, dataset_id):
         try:
-            dataset = EquipmentDataset.objects.get(pk=dataset_id)
+            with span('db_read'):
+                dataset = EquipmentDataset.objects.get(pk=dataset_id)
         except EquipmentDataset.DoesNotExist:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
-        pdf_bytes = build_pdf_report(dataset)
+        with span('pdf_build'):
+            pdf_bytes = build_pdf_report(dataset)
         response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="equipment_report_{dataset_id}.pdf"'
         return response
+
+
+class DatasetQueryView(APIView):
+    """Run a filter / group-by / aggregate query over a dataset (see query.py)."""
+
+    def post(self, request, dataset_id):
+        try:
+            with span('query'):
+                result = run_query(dataset_id, request.data)
+        except EquipmentDataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+
+class DatasetExportView(APIView):
+    """Stream a dataset's rows (or, with part='stats', its statistics) in an export format."""
+    part = 'rows'
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is not produced by a renderer; don't 406 on Accept: text/csv etc.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, dataset_id, fmt):
+        compress = request.query_params.get('compress') or None
+        try:
+            export.check(fmt, compress)
+            with span('db_read'):
+                if self.part == 'stats':
+                    columns, rows = export.stats_rows(dataset_id)
+                else:
+                    columns, rows = export.dataset_rows(dataset_id)
+        except EquipmentDataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except export.ExportUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        response = StreamingHttpResponse(
+            export.stream(columns, rows, fmt, compress),
+            content_type=export.content_type(fmt, compress),
+        )
+        filename = export.filename(dataset_id, self.part, fmt, compress)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class EventStreamView(APIView):
+    """
+    Server-Sent Events are only streamed by the async views (ASGI): here an open
+    stream would hold a sync worker. 204 tells EventSource not to reconnect, and
+    clients keep using /api/history/ instead.
+    """
+    renderer_classes = (EventStreamRenderer, JSONRenderer)
+
+    def get(self, request):
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
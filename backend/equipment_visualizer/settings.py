@@ -25,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'equipment_api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -54,6 +55,25 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'equipment_visualizer.wsgi.application'
+ASGI_APPLICATION = 'equipment_visualizer.asgi.application'
+
+# Serve the async API views (asgi.py turns this on by default)
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS', 'False').lower() == 'true'
+# Bounded pools for pandas / ReportLab work in async views (0 processes = use threads)
+API_BLOCKING_THREADS = int(os.environ.get('API_BLOCKING_THREADS', '4'))
+API_PROCESS_WORKERS = int(os.environ.get('API_PROCESS_WORKERS', '0'))
+# Import pandas / ReportLab at startup instead of on first use (for gunicorn preload, see gunicorn.conf.py)
+API_PRELOAD_HEAVY = os.environ.get('API_PRELOAD_HEAVY', 'False').lower() == 'true'
+
+# /api/events/ (SSE, async views only): DB poll interval
+EVENTS_POLL_SECONDS = float(os.environ.get('EVENTS_POLL_SECONDS', '1'))
+
+# /api/query/: decoded dataset frames kept per process, and result cache lifetime
+QUERY_FRAME_CACHE_SIZE = int(os.environ.get('QUERY_FRAME_CACHE_SIZE', '5'))
+QUERY_CACHE_SECONDS = int(os.environ.get('QUERY_CACHE_SECONDS', '300'))
+
+# /api/export/: rows encoded per chunk
+EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', '10000'))
 
 DATABASES = {
     'default': {
@@ -90,8 +110,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'equipment_api.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Performance instrumentation (/metrics is always on; these are opt-in)
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', 'False').lower() == 'true'
+METRICS_PROFILING_ENABLED = os.environ.get('METRICS_PROFILING', 'False').lower() == 'true'
+
 # Media files for uploaded CSVs (optional storage)
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
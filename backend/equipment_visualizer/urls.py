@@ -2,10 +2,12 @@ from django.contrib import admin
 from django.urls import path, include,re_path
 from django.views.generic import TemplateView
 from django.http import JsonResponse
+from equipment_api.metrics import metrics_view
 urlpatterns = [
     path('admin/', admin.site.urls),
 
     path('api/', include('equipment_api.urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', lambda request: JsonResponse({"message": "Backend API is running"})),
 ]
 
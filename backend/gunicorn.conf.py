@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn is started from backend/.
+
+GUNICORN_PRELOAD=true loads Django once in the master before forking, so the
+workers share its memory copy-on-write and start without importing anything.
+Add API_PRELOAD_HEAVY=true to load pandas and ReportLab in the master too;
+otherwise each worker imports them on its first upload/query/export/PDF request.
+"""
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'False').lower() == 'true'
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        # Keep the garbage collector off the preloaded objects; a collection in
+        # a worker would otherwise write to (and so copy) the shared pages.
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        # Never reuse a database connection opened in the master.
+        from django.db import connections
+        connections.close_all()
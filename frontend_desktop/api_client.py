@@ -1,41 +1,163 @@
 """
 API client for Chemical Equipment backend (Django REST).
 """
-import base64
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
 import requests
-from typing import Optional, List, Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 
 DEFAULT_BASE = "http://127.0.0.1:8000/api"
 
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 30)
+TRANSFER_TIMEOUT = (5, 120)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class EventsUnavailable(Exception):
+    """The server does not stream events (WSGI deployment answers /events/ with 204)."""
+
 
 class EquipmentAPIClient:
-    def __init__(self, base_url: str = DEFAULT_BASE, username: Optional[str] = None, password: Optional[str] = None):
+    """
+    Thin client over one pooled requests.Session: keep-alive connections, retries
+    with exponential backoff on connection errors and 502/503/504 (idempotent
+    requests only), gzip/deflate (plus zstd/br when urllib3 can decode them)
+    and streamed downloads. The session is safe to share across the worker
+    threads used by download_pdfs and the event listener.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        pool_size: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ):
         self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
         self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
         if username and password:
             self.session.auth = (username, password)
-            self.session.headers["Authorization"] = "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_json(self, path: str) -> Any:
+        r = self.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
 
     def upload_csv(self, file_path: str, name: Optional[str] = None) -> Dict[str, Any]:
+        # Not retried: a repeated POST would store the dataset twice.
         with open(file_path, "rb") as f:
-            files = {"file": (file_path.split("/")[-1].split("\\")[-1], f, "text/csv")}
+            files = {"file": (os.path.basename(file_path), f, "text/csv")}
             data = {} if not name else {"name": name}
-            r = self.session.post(f"{self.base_url}/upload/", files=files, data=data, timeout=30)
+            r = self.session.post(f"{self.base_url}/upload/", files=files, data=data, timeout=TRANSFER_TIMEOUT)
         r.raise_for_status()
         return r.json()
 
     def get_summary(self, dataset_id: int) -> Dict[str, Any]:
-        r = self.session.get(f"{self.base_url}/summary/{dataset_id}/", timeout=10)
-        r.raise_for_status()
-        return r.json()
+        return self._get_json(f"/summary/{dataset_id}/")
 
     def get_history(self) -> List[Dict[str, Any]]:
-        r = self.session.get(f"{self.base_url}/history/", timeout=10)
-        r.raise_for_status()
-        return r.json()
+        return self._get_json("/history/")
 
     def download_pdf(self, dataset_id: int, save_path: str) -> None:
-        r = self.session.get(f"{self.base_url}/report/{dataset_id}/pdf/", timeout=30)
-        r.raise_for_status()
-        with open(save_path, "wb") as f:
-            f.write(r.content)
+        """Stream the PDF to disk in chunks; save_path only appears once the download is complete."""
+        url = f"{self.base_url}/report/{dataset_id}/pdf/"
+        with self.session.get(url, stream=True, timeout=TRANSFER_TIMEOUT) as r:
+            r.raise_for_status()
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(save_path)), suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(tmp_path, save_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def download_pdfs(self, targets: Dict[int, str]) -> None:
+        """Download several reports concurrently; targets maps dataset id -> save path."""
+        if not targets:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(targets))) as pool:
+            list(pool.map(lambda item: self.download_pdf(*item), targets.items()))
+
+    def open_events(self, last_event_id: Optional[int] = None) -> requests.Response:
+        """
+        Open the /events/ stream and return the streaming response for read_events().
+        Raises EventsUnavailable if the server has no event stream.
+        """
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id is not None:
+            headers["Last-Event-ID"] = str(last_event_id)
+        # Read timeout well above the server's 15 s heartbeat.
+        r = self.session.get(f"{self.base_url}/events/", headers=headers, stream=True, timeout=(self.timeout[0], 60))
+        try:
+            r.raise_for_status()
+            if r.status_code == 204:
+                raise EventsUnavailable()
+        except BaseException:
+            r.close()
+            raise
+        return r
+
+    @staticmethod
+    def read_events(response: requests.Response) -> Iterator[Dict[str, Any]]:
+        """
+        Yield server-sent events as {"id", "event", "data"} until the stream ends.
+        Id-only messages are yielded with event None so callers can track the
+        position to resume from.
+        """
+        fields: Dict[str, str] = {}
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                if not line.startswith(":"):
+                    key, _, value = line.partition(":")
+                    fields[key] = value[1:] if value.startswith(" ") else value
+                continue
+            if "id" in fields:
+                yield {
+                    "id": int(fields["id"]),
+                    "event": fields.get("event") if "data" in fields else None,
+                    "data": json.loads(fields["data"]) if "data" in fields else None,
+                }
+            fields = {}
+
+    @staticmethod
+    def abort_events(response: requests.Response) -> None:
+        """Shut down an open stream from another thread, waking a read blocked on it."""
+        shutdown = getattr(response.raw, "shutdown", None)  # urllib3 >= 2.3
+        if shutdown is not None:
+            shutdown()
+        else:
+            response.close()
@@ -28,7 +28,7 @@ from PyQt5.QtWidgets import (
     QDialogButtonBox,
     QGridLayout,
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 
 import matplotlib
@@ -36,7 +36,7 @@ matplotlib.use("Qt5Agg")
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from api_client import EquipmentAPIClient, DEFAULT_BASE
+from api_client import EquipmentAPIClient, EventsUnavailable, DEFAULT_BASE
 
 
 class AuthDialog(QDialog):
@@ -60,6 +60,87 @@ class AuthDialog(QDialog):
         return self.user_edit.text().strip(), self.pass_edit.text()
 
 
+class EventListener(QThread):
+    """
+    Background SSE subscription. Newly created datasets are fetched here, off the
+    GUI thread, and emitted whole; deletions are emitted by id. Ends if the server
+    has no event stream; history is then only read on startup, login and upload.
+    """
+    dataset_created = pyqtSignal(dict)
+    dataset_deleted = pyqtSignal(int)
+
+    def __init__(self, client: EquipmentAPIClient, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self._response = None
+
+    def run(self):
+        last_id = None
+        while not self.isInterruptionRequested():
+            try:
+                response = self.client.open_events(last_id)
+            except EventsUnavailable:
+                return
+            except Exception:
+                self._pause(2000)  # server down; retry
+                continue
+            self._response = response
+            try:
+                with response:
+                    if self.isInterruptionRequested():  # stop() ran before _response was set
+                        return
+                    for ev in self.client.read_events(response):
+                        last_id = ev["id"]
+                        self._handle(ev)
+            except Exception:
+                self._pause(2000)  # stream dropped (or aborted by stop()); reconnect
+            finally:
+                self._response = None
+
+    def _handle(self, ev):
+        if ev["event"] == "dataset.created":
+            try:
+                dataset = self.client.get_summary(ev["data"]["id"])
+            except Exception:
+                return  # already trimmed by a newer upload
+            self.dataset_created.emit(dataset)
+        elif ev["event"] == "dataset.deleted":
+            self.dataset_deleted.emit(ev["data"]["id"])
+
+    def _pause(self, ms):
+        for _ in range(ms // 100):
+            if self.isInterruptionRequested():
+                return
+            self.msleep(100)
+
+    def stop(self):
+        """Ask the thread to finish and unblock its stream read; returns once it has."""
+        self.requestInterruption()
+        response = self._response
+        if response is not None:
+            self.client.abort_events(response)
+        self.wait()
+
+
+class PDFDownloader(QThread):
+    """Downloads several reports off the GUI thread (retries can take minutes on slow links)."""
+    succeeded = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, client: EquipmentAPIClient, targets, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.targets = targets
+
+    def run(self):
+        try:
+            self.client.download_pdfs(self.targets)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit()
+
+
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
@@ -115,7 +196,10 @@ class MainWindow(QMainWindow):
         self.client = EquipmentAPIClient(DEFAULT_BASE)
         self.history = []
         self.selected = None
+        self.listener = None
+        self.pdf_downloader = None
         self._build_ui()
+        self._start_listener()
 
     def _build_ui(self):
         central = QWidget()
@@ -161,6 +245,10 @@ class MainWindow(QMainWindow):
         self.pdf_btn.clicked.connect(self._on_download_pdf)
         self.pdf_btn.setEnabled(False)
         summary_layout.addWidget(self.pdf_btn)
+        self.pdf_all_btn = QPushButton("Download all reports")
+        self.pdf_all_btn.clicked.connect(self._on_download_all_pdfs)
+        self.pdf_all_btn.setEnabled(False)
+        summary_layout.addWidget(self.pdf_all_btn)
         self.tabs.addTab(summary_w, "Summary")
 
         # Charts
@@ -186,8 +274,49 @@ class MainWindow(QMainWindow):
             if u or p:
                 self.client = EquipmentAPIClient(DEFAULT_BASE, u, p)
                 self.auth_btn.setText(f"Auth: {u}")
+                self._start_listener()
             self._load_history()
 
+    def _start_listener(self):
+        if self.listener is not None:
+            self.listener.stop()
+        self.listener = EventListener(self.client, self)
+        self.listener.dataset_created.connect(self._on_dataset_created)
+        self.listener.dataset_deleted.connect(self._on_dataset_deleted)
+        self.listener.start()
+
+    def _on_dataset_created(self, dataset):
+        if any(item.get("id") == dataset.get("id") for item in self.history):
+            return  # our own upload
+        self.history = [dataset] + self.history[:4]
+        self._history_changed()
+
+    def _on_dataset_deleted(self, dataset_id):
+        if all(item.get("id") != dataset_id for item in self.history):
+            return
+        self.history = [item for item in self.history if item.get("id") != dataset_id]
+        self._history_changed()
+
+    def _history_changed(self):
+        self._refresh_history_combo()
+        selected_id = self.selected.get("id") if self.selected else None
+        ids = [item.get("id") for item in self.history]
+        if selected_id in ids:
+            self.history_combo.blockSignals(True)
+            self.history_combo.setCurrentIndex(ids.index(selected_id))
+            self.history_combo.blockSignals(False)
+        else:
+            self._set_selected(self.history[0] if self.history else None)
+
+    def closeEvent(self, event):
+        if self.listener is not None:
+            self.listener.stop()
+        if self.pdf_downloader is not None:
+            # Let running downloads finish rather than leave partial files behind.
+            self.hide()
+            self.pdf_downloader.wait()
+        super().closeEvent(event)
+
     def _on_upload(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select CSV", "", "CSV (*.csv)")
         if not path:
@@ -195,8 +324,8 @@ class MainWindow(QMainWindow):
         try:
             name = Path(path).stem
             data = self.client.upload_csv(path, name)
-            self.history.insert(0, data)
-            self.history = self.history[:5]
+            # The listener may already have added it from the dataset.created event.
+            self.history = [data] + [item for item in self.history if item.get("id") != data.get("id")][:4]
             self._refresh_history_combo()
             self.history_combo.setCurrentIndex(0)
             self._set_selected(data)
@@ -225,6 +354,7 @@ class MainWindow(QMainWindow):
         for item in self.history:
             self.history_combo.addItem(f"{item.get('name', '—')} — {item.get('total_count', 0)} rows", item)
         self.history_combo.blockSignals(False)
+        self.pdf_all_btn.setEnabled(bool(self.history) and self.pdf_downloader is None)
 
     def _on_history_selected(self, index):
         if index < 0 or index >= len(self.history):
@@ -278,6 +408,29 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "PDF error", str(e))
 
+    def _on_download_all_pdfs(self):
+        if not self.history:
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Save reports to")
+        if not folder:
+            return
+        targets = {
+            item["id"]: os.path.join(folder, f"equipment_report_{item['id']}.pdf") for item in self.history
+        }
+        self.pdf_all_btn.setEnabled(False)
+        self.pdf_downloader = PDFDownloader(self.client, targets, self)
+        self.pdf_downloader.succeeded.connect(
+            lambda: QMessageBox.information(self, "PDF", f"Saved {len(targets)} reports to {folder}")
+        )
+        self.pdf_downloader.failed.connect(lambda error: QMessageBox.critical(self, "PDF error", error))
+        self.pdf_downloader.finished.connect(self._on_pdf_downloads_finished)
+        self.pdf_downloader.start()
+
+    def _on_pdf_downloads_finished(self):
+        self.pdf_downloader.deleteLater()
+        self.pdf_downloader = None
+        self.pdf_all_btn.setEnabled(bool(self.history))
+
 
 def main():
     app = QApplication(sys.argv)
@@ -1,5 +1,5 @@
-import React, { useState, useEffect, useCallback } from 'react';
-import { uploadCSV, getHistory, setBasicAuth, clearBasicAuth, downloadPDFReport } from './api';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
+import { uploadCSV, getHistory, getSummary, setBasicAuth, clearBasicAuth, downloadPDFReport, subscribeEvents } from './api';
 import { Chart as ChartJS, ArcElement, Tooltip, Legend, CategoryScale, LinearScale, BarElement, Title } from 'chart.js';
 import { Doughnut, Bar } from 'react-chartjs-2';
 import './App.css';
@@ -15,30 +15,56 @@ function App() {
   const [authModal, setAuthModal] = useState(false);
   const [authUser, setAuthUser] = useState(localStorage.getItem('api_user') || '');
   const [authPass, setAuthPass] = useState('');
+  const [uploadStage, setUploadStage] = useState(null);
+  const [liveUpdates, setLiveUpdates] = useState(true);
+  const jobIdRef = useRef(null);
 
   const loadHistory = useCallback(async () => {
     setError(null);
     try {
       const data = await getHistory();
       setHistory(data);
-      if (data.length && !selected) setSelected(data[0]);
+      if (data.length) setSelected((s) => s || data[0]);
     } catch (e) {
       setError(e.message);
     }
-  }, [selected]);
+  }, []);
 
   useEffect(() => {
     loadHistory();
   }, [loadHistory]);
 
+  // Without live updates (server has no event stream), re-read history on each selection instead.
+  useEffect(() => {
+    if (!liveUpdates) loadHistory();
+  }, [liveUpdates, selected, loadHistory]);
+
+  // Live updates: fetch only the dataset that changed instead of re-polling history.
+  useEffect(() => subscribeEvents(async (type, data) => {
+    if (type === 'job.progress') {
+      if (data.job_id === jobIdRef.current) setUploadStage(data.stage);
+    } else if (type === 'dataset.deleted') {
+      setHistory((h) => h.filter((item) => item.id !== data.id));
+      setSelected((s) => (s?.id === data.id ? null : s));
+    } else if (type === 'dataset.created' && data.job_id !== jobIdRef.current) {
+      try {
+        const dataset = await getSummary(data.id);
+        setHistory((h) => (h.some((item) => item.id === dataset.id) ? h : [dataset, ...h].slice(0, 5)));
+      } catch (e) {
+        // Already trimmed by a newer upload; the matching dataset.deleted event covers it.
+      }
+    }
+  }, () => setLiveUpdates(false)), []);
+
   const handleFileUpload = async (e) => {
     const file = e.target.files?.[0];
     if (!file) return;
     setLoading(true);
     setError(null);
+    jobIdRef.current = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
     try {
-      const result = await uploadCSV(file, uploadName || file.name);
-      setHistory((h) => [result, ...h.slice(0, 4)]);
+      const result = await uploadCSV(file, uploadName || file.name, jobIdRef.current);
+      setHistory((h) => [result, ...h.filter((item) => item.id !== result.id).slice(0, 4)]);
       setSelected(result);
       setUploadName('');
       e.target.value = '';
@@ -46,6 +72,7 @@ function App() {
       setError(err.message);
     } finally {
       setLoading(false);
+      setUploadStage(null);
     }
   };
 
@@ -158,7 +185,7 @@ function App() {
               className="input-name"
             />
             <label className="btn btn-primary">
-              {loading ? 'Uploading…' : 'Choose file'}
+              {loading ? `Uploading…${uploadStage ? ` (${uploadStage})` : ''}` : 'Choose file'}
               <input type="file" accept=".csv" onChange={handleFileUpload} disabled={loading} hidden />
             </label>
           </div>
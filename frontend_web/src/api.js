@@ -11,10 +11,11 @@ export function getAuthHeaders() {
   return {};
 }
 
-export async function uploadCSV(file, name) {
+export async function uploadCSV(file, name, jobId) {
   const form = new FormData();
   form.append('file', file);
   if (name) form.append('name', name);
+  if (jobId) form.append('job_id', jobId);
   const res = await fetch(`${API_BASE}/upload/`, {
     method: 'POST',
     headers: getAuthHeaders(),
@@ -43,6 +44,22 @@ export async function getHistory() {
   return res.json();
 }
 
+export const EVENT_TYPES = ['dataset.created', 'dataset.deleted', 'job.progress'];
+
+// Live dataset events over SSE; EventSource reconnects and resumes on its own.
+// Servers without streaming (WSGI) answer 204, which closes the EventSource for
+// good; onUnavailable is then called once. Returns a function that closes the stream.
+export function subscribeEvents(onEvent, onUnavailable) {
+  const source = new EventSource(`${API_BASE}/events/`);
+  EVENT_TYPES.forEach((type) => {
+    source.addEventListener(type, (e) => onEvent(type, JSON.parse(e.data)));
+  });
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED && onUnavailable) onUnavailable();
+  };
+  return () => source.close();
+}
+
 export function getPDFReportUrl(datasetId) {
   return `${API_BASE}/report/${datasetId}/pdf/`;
 }